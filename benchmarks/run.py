@@ -0,0 +1,577 @@
+"""
+    Flask-Classy benchmarks
+    -----------------------
+
+    Measures what FlaskView costs on top of plain Flask: registering views,
+    dispatching requests through the proxies (with each combination of
+    wrapper methods, through the test client and straight through WSGI), and
+    the memory each registered view takes, along with a few of the optional
+    features.
+
+    Run it from the repository root::
+
+        python benchmarks/run.py --output results.json
+        python benchmarks/run.py --quick --only dispatch register
+        python benchmarks/run.py --output new.json --compare old.json
+
+    Results are written as JSON, so runs from different versions can be
+    compared with ``--compare``. Timings are the best and median of a few
+    repeats; anything ending in ``_us`` is microseconds per operation and
+    anything ending in ``_s`` is seconds.
+"""
+
+import argparse
+import functools
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flask
+import werkzeug
+from flask import Flask, jsonify
+from werkzeug.test import EnvironBuilder
+
+import flask_classy
+from flask_classy import (FlaskView, RateLimit, TokenBuckets, dumps_json,
+                          route)
+
+BENCHMARKS = []
+
+# Divides loop counts (and --quick also shrinks sizes) for a quicker smoke run.
+SCALE = 1
+
+
+def benchmark(f):
+    BENCHMARKS.append(f)
+    return f
+
+
+def loops(number):
+    return max(1, number // SCALE)
+
+
+def sizes(full, quick):
+    return quick if SCALE > 1 else full
+
+
+def measure(func, number, repeat=5):
+    """Calls `func` `number` times, `repeat` times over, and returns the best
+    and median time per call in microseconds.
+    """
+
+    number = loops(number)
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = perf_counter()
+        for _ in range(number):
+            func()
+        times.append((perf_counter() - start) / number)
+    return {"min_us": min(times) * 1e6,
+            "median_us": statistics.median(times) * 1e6,
+            "number": number, "repeat": repeat}
+
+
+def measure_once(func, repeat=3):
+    """Like :func:`measure`, for things that can only be done once per
+    setup. `func` does its own setup and returns the seconds the measured
+    part took.
+    """
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        times.append(func())
+    return {"min_s": min(times), "median_s": statistics.median(times),
+            "repeat": repeat}
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def wsgi_caller(app, path, method="GET", **kwargs):
+    """Returns a function that sends one request straight to the app's WSGI
+    callable, skipping the test client.
+    """
+
+    environ = EnvironBuilder(path=path, method=method, **kwargs).get_environ()
+    body = environ["wsgi.input"].read()
+
+    def call():
+        env = dict(environ)
+        env["wsgi.input"] = io.BytesIO(body)
+        result = app(env, start_response)
+        for _ in result:
+            pass
+        if hasattr(result, "close"):
+            result.close()
+
+    return call
+
+
+def client_caller(app, path, method="GET", **kwargs):
+    client = app.test_client()
+    return functools.partial(client.open, path, method=method, **kwargs)
+
+
+def passthrough(f):
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        return f(*args, **kwargs)
+    return wrapper
+
+
+def make_method(name, routes=0):
+    def view(self, item_id):
+        return "ok"
+    view.__name__ = name
+    for idx in range(routes):
+        view = route("/%s/%d/<item_id>" % (name, idx))(view)
+    return view
+
+
+def make_views(count, methods, routes=0, decorators=(), prefix="Synthetic"):
+    """Makes `count` FlaskView classes with `methods` methods each. Each
+    method has `routes` @route decorators, or none to use the generated
+    rule.
+    """
+
+    views = []
+    for idx in range(count):
+        attrs = {"decorators": list(decorators)}
+        for method in range(methods):
+            name = "method%d" % method
+            attrs[name] = make_method(name, routes)
+        views.append(type("%s%dView" % (prefix, idx), (FlaskView,), attrs))
+    return views
+
+
+def count_rules(app):
+    return len(list(app.url_map.iter_rules())) - 1  # the static rule
+
+
+@benchmark
+def register():
+    """register time for N classes x M methods, with and without @route
+    stacks and class decorators.
+    """
+
+    grid = sizes([(10, 10), (100, 10), (100, 50)], [(10, 10), (50, 10)])
+    variants = {"plain": {}, "routes": {"routes": 2},
+                "decorators": {"decorators": [passthrough, passthrough]}}
+    results = {}
+    for count, methods in grid:
+        for variant, options in variants.items():
+            rules = []
+
+            def run():
+                views = make_views(count, methods, **options)
+                app = Flask("bench")
+                start = perf_counter()
+                for view in views:
+                    view.register(app)
+                elapsed = perf_counter() - start
+                rules.append(count_rules(app))
+                return elapsed
+
+            result = measure_once(run)
+            result["rules"] = rules[-1]
+            result["per_rule_us"] = result["min_s"] / rules[-1] * 1e6
+            results["%dx%d_%s" % (count, methods, variant)] = result
+    return results
+
+
+@benchmark
+def register_all():
+    """register_all against one register call per class, at 50, 500 and
+    5,000 routes.
+    """
+
+    results = {}
+    for rules in sizes((50, 500, 5000), (50, 500)):
+        count = rules // 10
+
+        def one_by_one():
+            views = make_views(count, 10)
+            app = Flask("bench")
+            start = perf_counter()
+            for view in views:
+                view.register(app)
+            return perf_counter() - start
+
+        def all_at_once():
+            views = make_views(count, 10)
+            app = Flask("bench")
+            start = perf_counter()
+            flask_classy.register_all(app, views)
+            return perf_counter() - start
+
+        results["%d_routes" % rules] = {"register": measure_once(one_by_one),
+                                        "register_all": measure_once(all_at_once)}
+    return results
+
+
+@benchmark
+def startup():
+    """Registering 1,000 views with 5 methods each, eagerly and lazily."""
+
+    count = sizes(1000, 100)
+    results = {}
+    for lazy in (False, True):
+        def run():
+            views = make_views(count, 5)
+            app = Flask("bench")
+            start = perf_counter()
+            flask_classy.register_all(app, views, lazy=lazy)
+            return perf_counter() - start
+
+        results["lazy" if lazy else "eager"] = measure_once(run)
+    return results
+
+
+HOOK_COMBINATIONS = {
+    "none": (),
+    "before_request": ("before_request",),
+    "after_request": ("after_request",),
+    "request_hooks": ("before_request", "after_request"),
+    "view_hooks": ("before_index", "after_index"),
+    "all_hooks": ("before_request", "before_index", "after_index", "after_request"),
+}
+
+
+def make_hooked_view(name, hooks, **attrs):
+    def index(self):
+        return "ok"
+
+    def before_request(self, name, **kwargs):
+        pass
+
+    def before_index(self, **kwargs):
+        pass
+
+    def after_index(self, response):
+        return response
+
+    def after_request(self, name, response):
+        return response
+
+    hook_methods = {"before_request": before_request, "before_index": before_index,
+                    "after_index": after_index, "after_request": after_request}
+    attrs = dict(attrs, index=index, route_base="/%s/" % name)
+    for hook in hooks:
+        attrs[hook] = hook_methods[hook]
+    return type("%sView" % name.title().replace("_", ""), (FlaskView,), attrs)
+
+
+@benchmark
+def dispatch():
+    """Per-request time through the proxies for each combination of wrapper
+    methods, next to a bare Flask view, through the test client and through
+    WSGI directly.
+    """
+
+    app = Flask("bench")
+    app.add_url_rule("/bare/", "bare", lambda: "ok")
+    for name, hooks in HOOK_COMBINATIONS.items():
+        make_hooked_view(name, hooks).register(app)
+
+    results = {}
+    for harness, caller in (("wsgi", wsgi_caller), ("test_client", client_caller)):
+        bare = measure(caller(app, "/bare/"), 5000, repeat=7)
+        harness_results = {"bare_flask": bare}
+        for name in HOOK_COMBINATIONS:
+            result = measure(caller(app, "/%s/" % name), 5000, repeat=7)
+            result["overhead_us"] = result["min_us"] - bare["min_us"]
+            harness_results[name] = result
+        results[harness] = harness_results
+    return results
+
+
+@benchmark
+def instance_scopes():
+    """Requests per second for each instance_scope with 8 threads sending
+    requests at once.
+    """
+
+    threads = 8
+    per_thread = loops(2000)
+    results = {}
+    for scope in flask_classy.INSTANCE_SCOPES:
+        app = Flask("bench")
+        make_hooked_view("scoped", ("before_request",), classy_instance_scope=scope,
+                         classy_instance_pool_size=threads).register(app)
+        callers = [wsgi_caller(app, "/scoped/") for _ in range(threads)]
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(call):
+            barrier.wait()
+            for _ in range(per_thread):
+                call()
+
+        workers = [threading.Thread(target=worker, args=(call,)) for call in callers]
+        for t in workers:
+            t.start()
+        barrier.wait()
+        start = perf_counter()
+        for t in workers:
+            t.join()
+        elapsed = perf_counter() - start
+        results[scope] = {"requests_per_s": threads * per_thread / elapsed,
+                          "threads": threads, "requests": threads * per_thread}
+    return results
+
+
+def traced(func):
+    """Returns the result of `func` and the bytes it allocated and kept, and
+    its peak allocation.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = func()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    kept = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return result, kept, peak
+
+
+@benchmark
+def memory():
+    """Memory kept per registered class and per route, eagerly and lazily
+    registered, counting the app's URL map.
+    """
+
+    count, methods = sizes(200, 50), 5
+    results = {}
+    for lazy in (False, True):
+        views = make_views(count, methods)
+        app = Flask("bench")
+        _, kept, peak = traced(lambda: flask_classy.register_all(app, views, lazy=lazy))
+        results["lazy" if lazy else "eager"] = {
+            "per_class_bytes": kept / count,
+            "per_route_bytes": kept / (count * methods),
+            "peak_bytes": peak}
+    return results
+
+
+class TableView(FlaskView):
+    """Loads a large lookup table when it's created."""
+
+    def __init__(self):
+        self.table = dict((idx, ("row %d" % idx, idx * 2)) for idx in range(200000))
+
+    def get(self, key):
+        return str(self.table.get(int(key)))
+
+
+@benchmark
+def heavy_init():
+    """Startup time and memory for a view that loads a large table in
+    __init__, registered eagerly and lazily, and the first request to it.
+    """
+
+    results = {}
+    for lazy in (False, True):
+        app = Flask("bench")
+        start = perf_counter()
+        _, kept, peak = traced(lambda: TableView.register(app, lazy=lazy))
+        register_s = perf_counter() - start
+        call = wsgi_caller(app, "/table/7")
+        start = perf_counter()
+        call()
+        first_request_s = perf_counter() - start
+        results["lazy" if lazy else "eager"] = {
+            "register_s": register_s, "register_kept_bytes": kept,
+            "register_peak_bytes": peak, "first_request_s": first_request_s}
+    return results
+
+
+def make_payload(size):
+    row = {"id": 0, "name": "widget", "tags": ["a", "b"], "price": 1.5}
+    rows = max(1, size // len(json.dumps(row)))
+    return [dict(row, id=idx) for idx in range(rows)]
+
+
+@benchmark
+def representations():
+    """Serializing list results with representations against returning
+    jsonify from a bare Flask view, at 1 KB, 100 KB and 10 MB.
+    """
+
+    results = {}
+    for label, size, number in (("1kb", 1024, 2000), ("100kb", 100 * 1024, 200),
+                                ("10mb", 10 * 1024 * 1024, 3)):
+        payload = make_payload(size)
+        app = Flask("bench")
+        app.add_url_rule("/bare/", "bare", lambda: jsonify(payload))
+
+        class PayloadView(FlaskView):
+            classy_representations = {"application/json": dumps_json}
+
+            def index(self):
+                return payload
+
+        PayloadView.register(app)
+        bare = measure(wsgi_caller(app, "/bare/"), number, repeat=3)
+        represented = measure(wsgi_caller(app, "/payload/"), number, repeat=3)
+        results[label] = {"jsonify": bare, "representations": represented,
+                          "speedup": bare["min_us"] / represented["min_us"],
+                          "encoder": "orjson" if flask_classy.orjson else
+                                     "ujson" if flask_classy.ujson else "json"}
+    return results
+
+
+@benchmark
+def rate_limit():
+    """Token bucket checks per second, on the backend alone and through a
+    rate limited proxy. The target is 50,000 checks a second.
+    """
+
+    buckets = TokenBuckets()
+    keys = ["endpoint|10.0.0.%d" % (idx % 1000) for idx in range(1000)]
+    keys_iter = iter(keys * (loops(200000) // len(keys) + 2))
+
+    def take():
+        buckets.take(next(keys_iter), 1e9, 1e9)
+
+    backend = measure(take, 200000, repeat=1)
+    backend["checks_per_s"] = 1e6 / backend["min_us"]
+    backend["meets_50k_target"] = backend["checks_per_s"] >= 50000
+
+    app = Flask("bench")
+    app.add_url_rule("/bare/", "bare", lambda: "ok")
+    make_hooked_view("limited", (), classy_rate_limit=RateLimit(1e9)).register(app)
+    bare = measure(wsgi_caller(app, "/bare/"), 5000)
+    limited = measure(wsgi_caller(app, "/limited/"), 5000)
+    limited["overhead_us"] = limited["min_us"] - bare["min_us"]
+    return {"backend": backend, "proxy": limited, "bare_flask": bare}
+
+
+@benchmark
+def coalescing():
+    """A thundering herd of identical requests to a slow view, with and
+    without coalescing, counting how many times the backend was called.
+    """
+
+    threads = 50
+    results = {}
+    for coalesce in (False, True):
+        calls = []
+
+        class HerdView(FlaskView):
+            def get(self, key):
+                calls.append(key)
+                time.sleep(0.05)
+                return "value %s" % key
+
+        HerdView.classy_coalesce = coalesce or None
+        app = Flask("bench")
+        HerdView.register(app)
+        callers = [wsgi_caller(app, "/herd/hot") for _ in range(threads)]
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(call):
+            barrier.wait()
+            call()
+
+        workers = [threading.Thread(target=worker, args=(call,)) for call in callers]
+        for t in workers:
+            t.start()
+        barrier.wait()
+        start = perf_counter()
+        for t in workers:
+            t.join()
+        results["coalesced" if coalesce else "uncoalesced"] = {
+            "requests": threads, "backend_calls": len(calls),
+            "wall_s": perf_counter() - start}
+    results["backend_call_reduction"] = \
+        results["uncoalesced"]["backend_calls"] / results["coalesced"]["backend_calls"]
+    return results
+
+
+def get_meta():
+    return {"flask_classy": flask_classy.__version__,
+            "flask": flask.__version__,
+            "werkzeug": werkzeug.__version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "scale": SCALE,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+
+def flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            for item in flatten(value, prefix + key + "."):
+                yield item
+        else:
+            yield prefix + key, value
+
+
+def compare(results, baseline):
+    """Prints each timing next to the same timing in `baseline`."""
+
+    old = dict(flatten(baseline["results"]))
+    for key, value in flatten(results):
+        if not key.endswith(("min_us", "min_s")) or key not in old or not old[key]:
+            continue
+        print("%-60s %12.3f %12.3f %7.2fx" % (key, old[key], value, value / old[key]))
+
+
+def main(argv=None):
+    global SCALE
+
+    parser = argparse.ArgumentParser(description="Benchmarks Flask-Classy.")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a JSON file from an earlier run to compare with")
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        help="run only these benchmarks: %s"
+                             % ", ".join(f.__name__ for f in BENCHMARKS))
+    parser.add_argument("--quick", action="store_true",
+                        help="run a tenth of the loops, for a smoke test")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        SCALE = 10
+
+    results = {}
+    for func in BENCHMARKS:
+        if args.only and func.__name__ not in args.only:
+            continue
+        sys.stderr.write("%s...\n" % func.__name__)
+        start = perf_counter()
+        results[func.__name__] = func()
+        sys.stderr.write("  done in %.1fs\n" % (perf_counter() - start))
+
+    report = {"meta": get_meta(), "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
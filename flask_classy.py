@@ -10,14 +10,120 @@
 
 __version__ = "0.6.8"
 
-import sys
+import asyncio
+import bisect
+import collections
+import collections.abc
+import copy
+import cProfile
 import functools
+import hashlib
 import inspect
-from werkzeug.routing import parse_rule
-from flask import request, Response, make_response
+import itertools
+import json
+import math
+import os
+import pstats
+import signal
+import sys
+import tempfile
+from time import monotonic, perf_counter, sleep
+import threading
+import types
+import typing
+import uuid
+import warnings
+import weakref
+import zlib
+from werkzeug.routing import FloatConverter, parse_rule
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import (request, Response, make_response, stream_with_context, abort,
+                   current_app, copy_current_request_context)
+from werkzeug.test import EnvironBuilder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 import re
 
-_py2 = sys.version_info[0] == 2
+INSTANCE_SCOPES = ("shared", "route", "request", "pooled")
+
+JSON_MIMETYPE = "application/json"
+
+# Options to @route that configure how a view is called rather than the URL
+# rule, so they're not passed on to add_url_rule.
+VIEW_OPTIONS = ("etag", "stream", "executor", "max_concurrency", "max_queue",
+                "rate_limit", "compress", "coalesce")
+
+# Named ViewExecutors, used when a view's executor is given as a string.
+executors = {}
+
+# ConcurrencyLimiters by FlaskView class and method name, shared by every
+# registration of a view.
+concurrency_limiters = weakref.WeakKeyDictionary()
+
+_RULE_ARG_KINDS = (inspect.Parameter.POSITIONAL_ONLY,
+                   inspect.Parameter.POSITIONAL_OR_KEYWORD)
+
+_signature_cache = weakref.WeakKeyDictionary()
+_binder_cache = weakref.WeakKeyDictionary()
+_routes_lock = threading.Lock()
+# Since Python 3.12 only one cProfile profiler can be enabled at a time in
+# the whole process, so ViewProfilers take turns.
+_cprofile_lock = threading.Lock()
+
+
+class Path(str):
+    """Annotate a view argument with this to have it match the rest of the
+    URL, slashes and all, using Werkzeug's ``path`` converter.
+    """
+
+
+class NumberConverter(FloatConverter):
+    """Matches signed numbers with or without a decimal point and converts
+    them to floats. Werkzeug's own ``float`` converter only matches numbers
+    with a decimal point, so ``/price/3`` would be a 404.
+    """
+
+    regex = r"\d+(?:\.\d+)?"
+
+    def __init__(self, map, min=None, max=None, signed=True):
+        super(NumberConverter, self).__init__(map, min=min, max=max, signed=signed)
+
+
+# The Werkzeug converter used for view arguments annotated with each type.
+# Add your own types here, along with a converter in app.url_map.converters.
+url_converters = {
+    int: "int(signed=True)",
+    float: "number",
+    uuid.UUID: "uuid",
+    Path: "path",
+}
+
+# Converters added to the url_map of every app FlaskView classes are
+# registered on, unless it already has one by that name.
+url_converter_classes = {
+    "number": NumberConverter,
+}
+
+RouteRecord = collections.namedtuple(
+    "RouteRecord", "rule endpoint methods arguments view_name subdomain")
 
 
 def route(rule, **options):
@@ -40,6 +146,69 @@ def route(rule, **options):
     return decorator
 
 
+def cached(ttl=None, maxsize=1024, vary_on=(),
+           vary_on_headers=("Authorization", "Cookie"), backend=None):
+    """A decorator that caches the responses of a FlaskView method. Takes
+    the same arguments as :class:`CachePolicy`, which it attaches to the
+    method, overriding the class' `classy_cache_policy`.
+    """
+
+    policy = CachePolicy(ttl, maxsize, vary_on, vary_on_headers, backend)
+
+    def decorator(f):
+        f._cache_policy = policy
+        return f
+
+    return decorator
+
+
+def chunk_filter(f):
+    """A decorator for ``after_<name>`` and ``after_request`` methods that
+    turns them into filters over the response body. Instead of the response
+    they are called with each chunk of the body, as bytes, and return the
+    chunk to send in its place. Streamed responses are filtered as they are
+    sent, without being read into memory; other responses are filtered as a
+    single chunk.
+    """
+
+    f._chunk_filter = True
+    return f
+
+
+def dumps_json(data):
+    """Serializes `data` as JSON with the fastest encoder installed: orjson,
+    then ujson, then the standard library. Data the faster encoders can't
+    handle, like integers wider than 64 bits, is left to the standard
+    library.
+    """
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    elif ujson is not None:
+        try:
+            return ujson.dumps(data, ensure_ascii=False)
+        except OverflowError:
+            pass
+    return json.dumps(data, separators=(",", ":"))
+
+
+def loads_json(data):
+    """Parses JSON with the fastest decoder installed: orjson, then ujson,
+    then the standard library.
+    """
+
+    if orjson is not None:
+        return orjson.loads(data)
+    if ujson is not None:
+        return ujson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
 class FlaskView(object):
     """Base view for any class based views implemented with Flask-Classy. Will
     automatically configure routes when registered with a Flask app instance.
@@ -49,10 +218,26 @@ class FlaskView(object):
     route_base = None
     route_prefix = None
     trailing_slash = True
+    classy_instance_scope = "shared"
+    classy_instance_pool_size = 16
+    classy_metrics = None
+    classy_profiler = None
+    classy_cache_policy = None
+    classy_coalesce = None
+    classy_compress = None
+    classy_etag = False
+    classy_representations = None
+    classy_executor = None
+    classy_rate_limit = None
+    classy_max_concurrency = None
+    classy_max_queue = 0
+    classy_shed_status = 503
+    classy_retry_after = 1
+    classy_body_decoders = {JSON_MIMETYPE: loads_json}
 
     @classmethod
     def register(cls, app, route_base=None, subdomain=None, route_prefix=None,
-                 trailing_slash=None):
+                 trailing_slash=None, lazy=False, manifest=None):
         """Registers a FlaskView class for use with a specific instance of a
         Flask app. Any methods not prefixes with an underscore are candidates
         to be routed and will have routes registered when this method is
@@ -70,86 +255,22 @@ class FlaskView(object):
         :param route_prefix: A prefix to be applied to all routes registered
                              for this class. Precedes route_base. Overrides
                              the class' route_prefix if it has been set.
-        """
 
-        if cls is FlaskView:
-            raise TypeError("cls must be a subclass of FlaskView, not FlaskView itself")
-
-        if route_base:
-            cls.orig_route_base = cls.route_base
-            cls.route_base = route_base
-
-        if route_prefix:
-            cls.orig_route_prefix = cls.route_prefix
-            cls.route_prefix = route_prefix
-
-        if not subdomain:
-            if hasattr(app, "subdomain") and app.subdomain is not None:
-                subdomain = app.subdomain
-            elif hasattr(cls, "subdomain"):
-                subdomain = cls.subdomain
-
-        if trailing_slash is not None:
-            cls.orig_trailing_slash = cls.trailing_slash
-            cls.trailing_slash = trailing_slash
-
-
-        members = get_interesting_members(FlaskView, cls)
-        special_methods = ["get", "put", "patch", "post", "delete", "index"]
-
-        for name, value in members:
-            proxy = cls.make_proxy_method(name)
-            route_name = cls.build_route_name(name)
-            try:
-                if hasattr(value, "_rule_cache") and name in value._rule_cache:
-                    for idx, cached_rule in enumerate(value._rule_cache[name]):
-                        rule, options = cached_rule
-                        rule = cls.build_rule(rule)
-                        sub, ep, options = cls.parse_options(options)
-
-                        if not subdomain and sub:
-                            subdomain = sub
-
-                        if ep:
-                            endpoint = ep
-                        elif len(value._rule_cache[name]) == 1:
-                            endpoint = route_name
-                        else:
-                            endpoint = "%s_%d" % (route_name, idx,)
-
-                        app.add_url_rule(rule, endpoint, proxy, subdomain=subdomain, **options)
-
-                elif name in special_methods:
-                    if name in ["get", "index"]:
-                        methods = ["GET"]
-                    else:
-                        methods = [name.upper()]
+        :param lazy: If True, the class is not instantiated, and its
+                     decorators are not applied, until the first request
+                     for each view comes in.
 
-                    rule = cls.build_rule("/", value)
-                    if not cls.trailing_slash:
-                        rule = rule.rstrip("/")
-                    app.add_url_rule(rule, route_name, proxy, methods=methods, subdomain=subdomain)
+        :param manifest: A :class:`RouteManifest`. Rules recorded in it for
+                         this class and these arguments are used as they
+                         are, and newly built rules are saved to it.
+        """
 
-                else:
-                    route_str = '/%s/' % name
-                    if not cls.trailing_slash:
-                        route_str = route_str.rstrip('/')
-                    rule = cls.build_rule(route_str, value)
-                    app.add_url_rule(rule, route_name, proxy, subdomain=subdomain)
-            except DecoratorCompatibilityError:
-                raise DecoratorCompatibilityError("Incompatible decorator detected on %s in class %s" % (name, cls.__name__))
-
-        if hasattr(cls, "orig_route_base"):
-            cls.route_base = cls.orig_route_base
-            del cls.orig_route_base
-
-        if hasattr(cls, "orig_route_prefix"):
-            cls.route_prefix = cls.orig_route_prefix
-            del cls.orig_route_prefix
-
-        if hasattr(cls, "orig_trailing_slash"):
-            cls.trailing_slash = cls.orig_trailing_slash
-            del cls.orig_trailing_slash
+        url_rules = build_url_rules(cls, app, route_base, subdomain, route_prefix,
+                                    trailing_slash, lazy, manifest)
+        add_url_rules(app, url_rules)
+        record_routes(cls, url_rules)
+        if manifest is not None and manifest.dirty:
+            manifest.save()
 
     @classmethod
     def parse_options(cls, options):
@@ -159,62 +280,99 @@ class FlaskView(object):
         options = options.copy()
         subdomain = options.pop('subdomain', None)
         endpoint = options.pop('endpoint', None)
+        for view_option in VIEW_OPTIONS:
+            options.pop(view_option, None)
         return subdomain, endpoint, options,
 
 
     @classmethod
-    def make_proxy_method(cls, name):
+    def make_proxy_method(cls, name, lazy=False, shared_instance=None):
         """Creates a proxy function that can be used by Flasks routing. The
         proxy instantiates the FlaskView subclass and calls the appropriate
-        method.
+        method. The wrapper methods for the view are looked up once, here,
+        so the proxy only calls the ones that actually exist.
+
+        How instances are created depends on the class' `classy_instance_scope`:
+
+        - ``"shared"``: a single instance is used by every request, and by
+          every proxy made with the same `shared_instance`.
+        - ``"route"``: a single instance is created here and used by every
+          request to this proxy only.
+        - ``"request"``: a new instance is created for every request.
+        - ``"pooled"``: instances are borrowed from a free-list holding at
+          most `classy_instance_pool_size` instances. When an instance is
+          returned its attributes are reset to a deep copy of what they were
+          after ``__init__``, so anything set there must be copyable.
+
+        If the view or any of its wrapper methods is a coroutine function the
+        proxy is a coroutine function too, which Flask 2.0 and later will
+        await. Wrapper methods and views may then freely mix ``def`` and
+        ``async def``.
 
         :param name: the name of the method to create a proxy for
-        """
-
-        i = cls()
-        view = getattr(i, name)
-
-        if cls.decorators:
-            for decorator in cls.decorators:
-                view = decorator(view)
-
-        @functools.wraps(view)
-        def proxy(**forgettable_view_args):
-            # Always use the global request object's view_args, because they
-            # can be modified by intervening function before an endpoint or
-            # wrapper gets called. This matches Flask's behavior.
-            del forgettable_view_args
-
-            if hasattr(i, "before_request"):
-                response = i.before_request(name, **request.view_args)
-                if response is not None:
-                    return response
-
-            before_view_name = "before_" + name
-            if hasattr(i, before_view_name):
-                before_view = getattr(i, before_view_name)
-                response = before_view(**request.view_args)
-                if response is not None:
-                    return response
-
-            response = view(**request.view_args)
-            if not isinstance(response, Response):
-                response = make_response(response)
-
-            after_view_name = "after_" + name
-            if hasattr(i, after_view_name):
-                after_view = getattr(i, after_view_name)
-                response = after_view(response)
 
-            if hasattr(i, "after_request"):
-                response = i.after_request(name, response)
+        :param lazy: if True, return a placeholder that only creates the
+                     real proxy when it is first called.
 
-            return response
+        :param shared_instance: a :class:`_LazyInstance` providing the
+                                instance for the ``"shared"`` scope. If it
+                                is not given a new instance is created.
+        """
 
+        scope = cls.classy_instance_scope
+        if scope not in INSTANCE_SCOPES:
+            raise ValueError("classy_instance_scope must be one of %s, not %r"
+                             % (", ".join(INSTANCE_SCOPES), scope))
+
+        if lazy:
+            return make_lazy_proxy(cls, name, shared_instance)
+
+        endpoint = cls.build_route_name(name)
+        options = get_view_options(getattr(cls, name), name)
+        is_async = is_async_view(cls, name)
+        instrument = None
+        if cls.classy_metrics is not None:
+            instrument = _Instrument(cls.classy_metrics, endpoint, is_async)
+        bind = functools.partial(_BoundInstance, name=name, options=options,
+                                 instrument=instrument, is_async=is_async,
+                                 binder=get_argument_binder(getattr(cls, name)),
+                                 coalescer=get_coalescer(options.get("coalesce", cls.classy_coalesce)))
+
+        if scope == "request":
+            instances = _InstancePerRequest(cls, bind)
+        elif scope == "pooled":
+            instances = _InstancePool(cls, bind, cls.classy_instance_pool_size)
+        elif scope == "shared" and shared_instance is not None:
+            instances = _SharedInstance(shared_instance.get(), bind)
+        else:
+            instances = _SharedInstance(cls(), bind)
+
+        proxy = make_dispatching_proxy(getattr(cls, name), instances, is_async)
+        if cls.classy_profiler is not None:
+            proxy = cls.classy_profiler.wrap(endpoint, proxy, is_async)
+
+        max_concurrency = options.get("max_concurrency", cls.classy_max_concurrency)
+        if max_concurrency is not None:
+            limiters = concurrency_limiters.get(cls)
+            if limiters is None:
+                limiters = concurrency_limiters.setdefault(cls, {})
+            limiter = limiters.get(name)
+            if limiter is None:
+                limiter = limiters.setdefault(name, ConcurrencyLimiter(
+                    max_concurrency, options.get("max_queue", cls.classy_max_queue),
+                    cls.classy_shed_status, cls.classy_retry_after))
+            proxy = limiter.wrap(proxy, is_async)
+
+        rate_limit = options.get("rate_limit", cls.classy_rate_limit)
+        if rate_limit is not None:
+            proxy = rate_limit.wrap(endpoint, proxy, is_async)
+
+        if instrument is not None:
+            proxy = instrument.wrap("total", proxy, wraps=True)
         return proxy
 
     @classmethod
-    def build_rule(cls, rule, method=None):
+    def build_rule(cls, rule, method=None, prefix=None):
         """Creates a routing rule based on either the class name (minus the
         'View' suffix) or the defined `route_base` attribute of the class
 
@@ -224,31 +382,14 @@ class FlaskView(object):
         :param method: if a method's arguments should be considered when
                        constructing the rule, provide a reference to the
                        method here. arguments named "self" will be ignored
-        """
-
-        rule_parts = []
-
-        if cls.route_prefix:
-            rule_parts.append(cls.route_prefix)
 
-        route_base = cls.get_route_base()
-        if route_base:
-            rule_parts.append(route_base)
-
-        rule_parts.append(rule)
-        ignored_rule_args = ['self']
-        if hasattr(cls, 'base_args'):
-            ignored_rule_args += cls.base_args
-
-        if method:
-            args = get_true_argspec(method)[0]
-            for arg in args:
-                if arg not in ignored_rule_args:
-                    rule_parts.append("<%s>" % arg)
-
-        result = "/%s" % "/".join(rule_parts)
-        return re.sub(r'(/)\1+', r'\1', result)
+        :param prefix: the :class:`RoutePrefix` to build on. Defaults to the
+                       one for the class' own attributes.
+        """
 
+        if prefix is None:
+            prefix = RoutePrefix.for_class(cls)
+        return prefix.join(rule, get_rule_params(method) if method else ())
 
     @classmethod
     def get_route_base(cls):
@@ -256,8 +397,6 @@ class FlaskView(object):
 
         if cls.route_base is not None:
             route_base = cls.route_base
-            base_rule = parse_rule(route_base)
-            cls.base_args = [r[2] for r in base_rule]
         else:
             if cls.__name__.endswith("View"):
                 route_base = cls.__name__[:-4].lower()
@@ -266,7 +405,6 @@ class FlaskView(object):
 
         return route_base.strip("/")
 
-
     @classmethod
     def build_route_name(cls, method_name):
         """Creates a unique route name based on the combination of the class
@@ -277,46 +415,2681 @@ class FlaskView(object):
         return cls.__name__ + ":%s" % method_name
 
 
+def register_all(app, views, **common_options):
+    """Registers many FlaskView classes with a specific instance of a Flask
+    app in one go. The rules for every class are built before any of
+    them are added to the app, so an incompatible decorator or an
+    endpoint used by two different views is reported before the app has
+    been touched.
+
+    :param app: an instance of a Flask application
+
+    :param views: the FlaskView subclasses to register. An item may also
+                  be a ``(view_class, options)`` tuple, where options
+                  override `common_options` for that class.
+
+    :param common_options: keyword arguments accepted by
+                           :meth:`FlaskView.register`, used for every class.
+    """
+
+    rules = []
+    built = []
+    manifests = []
+    for view in views:
+        if isinstance(view, tuple):
+            view, options = view
+            options = dict(common_options, **options)
+        else:
+            options = common_options
+        url_rules = build_url_rules(view, app, **options)
+        rules.extend(url_rules)
+        built.append((view, url_rules))
+        manifest = options.get("manifest")
+        if manifest is not None and not any(manifest is m for m in manifests):
+            manifests.append(manifest)
+
+    add_url_rules(app, rules)
+    for view, url_rules in built:
+        record_routes(view, url_rules)
+
+    for manifest in manifests:
+        if manifest.dirty:
+            manifest.save()
+
+
+def build_url_rules(cls, app, route_base=None, subdomain=None,
+                    route_prefix=None, trailing_slash=None, lazy=False,
+                    manifest=None):
+    """Builds the URL rules that ``cls.register`` would add to `app`,
+    without adding them. Returns a list of ``(rule, endpoint, view_func,
+    options)`` tuples, where options are the keyword arguments for
+    ``app.add_url_rule``. Takes the same arguments as
+    :meth:`FlaskView.register`.
+    """
+
+    if cls is FlaskView:
+        raise TypeError("cls must be a subclass of FlaskView, not FlaskView itself")
+
+    manifest_key = None
+    if manifest is not None:
+        manifest_key = manifest.key(cls, app, (route_base, subdomain,
+                                               route_prefix, trailing_slash))
+        named_rules = manifest.get(manifest_key)
+        if named_rules is not None:
+            return bind_url_rules(cls, named_rules, lazy)
+
+    if not subdomain:
+        if hasattr(app, "subdomain") and app.subdomain is not None:
+            subdomain = app.subdomain
+        elif hasattr(cls, "subdomain"):
+            subdomain = cls.subdomain
+
+    prefix = RoutePrefix.for_class(cls, route_base, route_prefix, trailing_slash)
+    named_rules = []
+    members = get_interesting_members(FlaskView, cls)
+    special_methods = ["get", "put", "patch", "post", "delete", "index"]
+
+    for name, value in members:
+        route_name = cls.build_route_name(name)
+        try:
+            if hasattr(value, "_rule_cache") and name in value._rule_cache:
+                for idx, cached_rule in enumerate(value._rule_cache[name]):
+                    rule, options = cached_rule
+                    rule = cls.build_rule(rule, prefix=prefix)
+                    sub, ep, options = cls.parse_options(options)
+
+                    if not subdomain and sub:
+                        subdomain = sub
+
+                    if ep:
+                        endpoint = ep
+                    elif len(value._rule_cache[name]) == 1:
+                        endpoint = route_name
+                    else:
+                        endpoint = "%s_%d" % (route_name, idx,)
+
+                    options["subdomain"] = subdomain
+                    named_rules.append((rule, endpoint, name, options))
+
+            elif name in special_methods:
+                if name in ["get", "index"]:
+                    methods = ["GET"]
+                else:
+                    methods = [name.upper()]
+
+                rule = cls.build_rule("/", value, prefix)
+                if not prefix.trailing_slash:
+                    rule = rule.rstrip("/")
+                named_rules.append((rule, route_name, name,
+                                    {"methods": methods, "subdomain": subdomain}))
+
+            else:
+                route_str = '/%s/' % name
+                if not prefix.trailing_slash:
+                    route_str = route_str.rstrip('/')
+                rule = cls.build_rule(route_str, value, prefix)
+                named_rules.append((rule, route_name, name, {"subdomain": subdomain}))
+        except DecoratorCompatibilityError:
+            raise DecoratorCompatibilityError("Incompatible decorator detected on %s in class %s" % (name, cls.__name__))
+
+    if manifest_key is not None:
+        manifest.put(manifest_key, named_rules)
+
+    return bind_url_rules(cls, named_rules, lazy)
+
+
+def bind_url_rules(cls, named_rules, lazy=False):
+    """Turns ``(rule, endpoint, method_name, options)`` tuples into the
+    ``(rule, endpoint, view_func, options)`` tuples returned by
+    :func:`build_url_rules`, making one proxy per method.
+    """
+
+    shared_instance = _LazyInstance(cls)
+    proxies = {}
+    url_rules = []
+    for rule, endpoint, name, options in named_rules:
+        if name not in proxies:
+            proxies[name] = cls.make_proxy_method(name, lazy, shared_instance)
+            proxies[name]._classy_view_name = name
+        url_rules.append((rule, endpoint, proxies[name], options))
+    return url_rules
+
+
+def add_url_rules(app, url_rules):
+    """Adds rules built by :func:`build_url_rules` to an app or blueprint,
+    after making sure no endpoint would be bound to two different view
+    functions.
+    """
+
+    existing = getattr(app, "view_functions", {})
+    seen = {}
+    for rule, endpoint, view_func, options in url_rules:
+        other = seen.setdefault(endpoint, view_func)
+        if other is view_func:
+            other = existing.get(endpoint, view_func)
+        if other is not view_func:
+            raise EndpointCollisionError(
+                "Endpoint %r for rule %r is already used by another view"
+                % (endpoint, rule))
+
+    add_url_converters(app)
+    for rule, endpoint, view_func, options in url_rules:
+        app.add_url_rule(rule, endpoint, view_func, **options)
+
+
+def add_url_converters(app):
+    """Adds the converters in `url_converter_classes` to an app, or to every
+    app a blueprint is registered on.
+    """
+
+    url_map = getattr(app, "url_map", None)
+    if url_map is not None:
+        for name, converter in url_converter_classes.items():
+            url_map.converters.setdefault(name, converter)
+    elif hasattr(app, "record"):
+        app.record(lambda state: add_url_converters(state.app))
+
+
+class RoutePrefix(collections.namedtuple(
+        "RoutePrefix", "segments ignored_args trailing_slash")):
+    """The part of a FlaskView's rules that comes from the class and its
+    registration rather than from each method: the route prefix and route
+    base split into path segments, the names of the variables they already
+    hold (which aren't appended again from a method's arguments), and
+    whether generated rules end in a slash. It's worked out once per
+    registration, so the class itself is never modified.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def for_class(cls, view, route_base=None, route_prefix=None,
+                  trailing_slash=None):
+        """Returns the prefix for registering `view`, with the same
+        overrides :meth:`FlaskView.register` takes.
+        """
+
+        route_prefix = route_prefix or view.route_prefix or ""
+        route_base = route_base.strip("/") if route_base else view.get_route_base()
+        if trailing_slash is None:
+            trailing_slash = view.trailing_slash
+
+        ignored_args = {"self"}
+        for rule in (route_prefix, route_base):
+            if "<" in rule:
+                ignored_args.update(variable for converter, arguments, variable
+                                    in parse_rule(rule) if converter is not None)
+
+        segments = tuple(segment for part in (route_prefix, route_base)
+                         for segment in part.split("/") if segment)
+        return cls(segments, frozenset(ignored_args), trailing_slash)
+
+    def join(self, rule, rule_params=()):
+        """Returns the full rule for `rule`, followed by a variable for each
+        ``(name, converter)`` in `rule_params` that isn't in the prefix, with
+        no empty segments.
+        """
+
+        segments = list(self.segments)
+        segments.extend(segment for segment in rule.split("/") if segment)
+        trailing = not rule or rule.endswith("/")
+        for arg, converter in rule_params:
+            if arg in self.ignored_args:
+                continue
+            if converter is not None:
+                segments.append("<%s:%s>" % (converter, arg))
+            else:
+                segments.append("<%s>" % arg)
+            trailing = False
+
+        if not segments:
+            return "/"
+        return "/%s/" % "/".join(segments) if trailing else "/" + "/".join(segments)
+
+
+def record_routes(cls, url_rules):
+    """Records rules built by :func:`build_url_rules` once they have been
+    added to an app, so :func:`get_routes` can return them.
+    """
+
+    records = tuple(
+        RouteRecord(rule, endpoint, tuple(options.get("methods") or ("GET",)),
+                    tuple(variable for converter, arguments, variable
+                          in parse_rule(rule) if converter is not None),
+                    view_func._classy_view_name, options.get("subdomain"))
+        for rule, endpoint, view_func, options in url_rules)
+    with _routes_lock:
+        cls._classy_routes = cls.__dict__.get("_classy_routes", ()) + records
+
+
+def get_routes(cls):
+    """Returns a :class:`RouteRecord` for every rule added by registering
+    the FlaskView class `cls`, in the order they were added, with the rule,
+    endpoint, methods, names of the rule's arguments, the method it routes to
+    and the subdomain.
+    """
+
+    return list(cls.__dict__.get("_classy_routes", ()))
+
+
 def get_interesting_members(base_class, cls):
-    """Returns a list of methods that can be routed to"""
+    """Returns a list of methods that can be routed to. The list is computed
+    once per class and reused until a method is added to, replaced on or
+    removed from the class or one of its bases.
+    """
+
+    state = _get_method_state(cls)
+    cached = cls.__dict__.get("_classy_members")
+    if cached is not None and cached[0] is base_class and cached[1] == state:
+        return list(cached[2])
 
     base_members = dir(base_class)
-    predicate = inspect.ismethod if _py2 else inspect.isfunction
-    all_members = inspect.getmembers(cls, predicate=predicate)
-    return [member for member in all_members
-            if not member[0] in base_members
-            and ((hasattr(member[1], "__self__") and not member[1].__self__ in inspect.getmro(cls)) if _py2 else True)
-            and not member[0].startswith("_")
-            and not member[0].startswith("before_")
-            and not member[0].startswith("after_")]
+    all_members = inspect.getmembers(cls, predicate=inspect.isfunction)
+    members = [member for member in all_members
+               if not member[0] in base_members
+               and not member[0].startswith("_")
+               and not member[0].startswith("before_")
+               and not member[0].startswith("after_")
+               and not member[0].startswith("etag_")]
 
+    cls._classy_members = (base_class, state, tuple(members))
+    return members
 
-def get_true_argspec(method):
-    """Drills through layers of decorators attempting to locate the actual argspec for the method."""
 
-    argspec = inspect.getargspec(method)
-    args = argspec[0]
-    if args and args[0] == 'self':
-        return argspec
-    if hasattr(method, '__func__'):
-        method = method.__func__
-    if not hasattr(method, '__closure__') or method.__closure__ is None:
-        raise DecoratorCompatibilityError
+def _get_method_state(cls):
+    """Returns everything that can affect which methods of a class are routed,
+    so a cached member list can be checked against it.
+    """
 
-    closure = method.__closure__
-    for cell in closure:
-        inner_method = cell.cell_contents
-        if inner_method is method:
-            continue
-        if not inspect.isfunction(inner_method) \
-            and not inspect.ismethod(inner_method):
-            continue
-        true_argspec = get_true_argspec(inner_method)
-        if true_argspec:
-            return true_argspec
+    return tuple((name, value)
+                 for klass in cls.__mro__
+                 for name, value in vars(klass).items()
+                 if not name.startswith("_") and hasattr(value, "__get__"))
 
 
-class DecoratorCompatibilityError(Exception):
+class BatchView(FlaskView):
+    """A view that handles many requests in one. Register it like any other
+    FlaskView, then ``POST`` a JSON array of sub-requests to it::
+
+        [{"method": "GET", "path": "/widgets/1"},
+         {"method": "POST", "path": "/widgets/", "body": {"name": "knob"}}]
+
+    Each sub-request is dispatched through the app as if it had been sent on
+    its own, so URL matching, the app's request handlers and every FlaskView
+    hook run as usual. The response is a JSON array with a ``status``,
+    ``headers`` and ``body`` for each sub-request, in the same order.
+    Bodies of JSON responses are included as JSON, others as text.
+
+    Sub-requests inherit the headers listed in `classy_inherit_headers` from
+    the batch request. With `classy_parallel` set they run on a thread pool
+    of `classy_max_workers` threads shared by the class.
+    """
+
+    classy_parallel = False
+    classy_max_workers = 8
+    classy_max_batch_size = 50
+    classy_inherit_headers = ("Authorization", "Cookie")
+
+    # Describe the client's connection rather than the request, so
+    # sub-requests share them with the batch request.
+    _inherit_environ = ("REMOTE_ADDR", "REMOTE_PORT", "REMOTE_USER")
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def post(self):
+        batch = request.get_json(silent=True)
+        if not isinstance(batch, list):
+            abort(400)
+        if len(batch) > self.classy_max_batch_size:
+            abort(413)
+
+        app = current_app._get_current_object()
+        environs = [self._build_environ(sub_request) for sub_request in batch]
+
+        if self.classy_parallel and len(environs) > 1:
+            results = list(self._get_executor().map(
+                functools.partial(self._dispatch, app), environs))
+        else:
+            results = [self._dispatch(app, environ) for environ in environs]
+
+        return Response(dumps_json(results), mimetype=JSON_MIMETYPE)
+
+    def _build_environ(self, sub_request):
+        if not isinstance(sub_request, dict):
+            return None
+        path = sub_request.get("path")
+        method = sub_request.get("method", "GET")
+        sub_headers = sub_request.get("headers") or {}
+        if not isinstance(path, str) or not isinstance(method, str) \
+                or not isinstance(sub_headers, dict) \
+                or not all(isinstance(value, str) for value in sub_headers.values()):
+            return None
+        if path.split("?", 1)[0] == request.path:
+            # Batches of batches would make it far too easy to run away.
+            return None
+
+        headers = dict((name, request.headers[name])
+                       for name in self.classy_inherit_headers
+                       if name in request.headers)
+        headers.update(sub_headers)
+
+        kwargs = {}
+        if "body" in sub_request:
+            kwargs["data"] = dumps_json(sub_request["body"])
+            kwargs["content_type"] = JSON_MIMETYPE
+
+        environ_base = dict((key, request.environ[key])
+                            for key in self._inherit_environ
+                            if key in request.environ)
+
+        return EnvironBuilder(path=path, method=method.upper(),
+                              base_url=request.url_root, headers=headers,
+                              environ_base=environ_base, **kwargs).get_environ()
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=cls.classy_max_workers)
+        return cls._executor
+
+    @staticmethod
+    def _dispatch(app, environ):
+        if environ is None:
+            return {"status": 400, "headers": {}, "body": None}
+
+        # A new app context keeps g from leaking between the batch request
+        # and its sub-requests, which would otherwise share the batch's.
+        with app.app_context(), app.request_context(environ):
+            try:
+                response = app.full_dispatch_request()
+            except Exception as e:
+                response = app.make_response(app.handle_exception(e))
+
+        try:
+            if response.is_json:
+                body = response.get_json()
+            else:
+                body = response.get_data(as_text=True)
+        finally:
+            # Runs call_on_close, which returns pooled instances and frees
+            # concurrency slots held by streamed responses.
+            response.close()
+        return {"status": response.status_code,
+                "headers": dict(response.headers),
+                "body": body}
+
+
+def make_dispatching_proxy(method, instances, is_async):
+    """Returns the function Flask calls for a view. It gets a bound instance
+    from `instances` and dispatches the current request to it.
+    """
+
+    if is_async:
+        @functools.wraps(method)
+        async def proxy(**forgettable_view_args):
+            del forgettable_view_args
+            entry = instances.acquire()
+            try:
+                response = await dispatch_view_async(
+                    entry.view, entry.before_hooks, entry.after_hooks)
+            except BaseException:
+                instances.release(entry)
+                raise
+            release_after(response, instances, entry)
+            return response
+
+        return proxy
+
+    if not isinstance(instances, _SharedInstance):
+        @functools.wraps(method)
+        def proxy(**forgettable_view_args):
+            del forgettable_view_args
+            entry = instances.acquire()
+            try:
+                response = dispatch_view(
+                    entry.view, entry.before_hooks, entry.after_hooks)
+            except BaseException:
+                instances.release(entry)
+                raise
+            release_after(response, instances, entry)
+            return response
+
+        return proxy
+
+    view = instances.entry.view
+    before_hooks = instances.entry.before_hooks
+    after_hooks = instances.entry.after_hooks
+    if not before_hooks and not after_hooks:
+        @functools.wraps(view)
+        def proxy(**forgettable_view_args):
+            # Always use the global request object's view_args, because they
+            # can be modified by intervening function before an endpoint or
+            # wrapper gets called. This matches Flask's behavior.
+            del forgettable_view_args
+            response = view(**request.view_args)
+            if not isinstance(response, Response):
+                response = make_response(response)
+            return response
+
+        return proxy
+
+    @functools.wraps(view)
+    def proxy(**forgettable_view_args):
+        del forgettable_view_args
+        return dispatch_view(view, before_hooks, after_hooks)
+
+    return proxy
+
+
+def is_streaming_view(method, options):
+    """Returns True if a view's response should be streamed, either because
+    the method is a generator function or because it was routed with
+    ``stream=True``.
+    """
+
+    if "stream" in options:
+        return bool(options["stream"])
+    return inspect.isgeneratorfunction(inspect.unwrap(method))
+
+
+def make_streaming_view(view, is_async):
+    """Returns a view that turns an iterator returned by `view` into a
+    streamed response that keeps the request context while it is sent.
+    """
+
+    def to_response(rv):
+        if inspect.isgenerator(rv) or isinstance(rv, collections.abc.Iterator):
+            return Response(stream_with_context(rv))
+        return rv
+
+    if is_async:
+        async def streaming_view(**view_args):
+            rv = view(**view_args)
+            if inspect.isawaitable(rv):
+                rv = await rv
+            return to_response(rv)
+    else:
+        def streaming_view(**view_args):
+            return to_response(view(**view_args))
+
+    return streaming_view
+
+
+def get_body_arg(method):
+    """Returns "body" if a view method takes a keyword-only argument of that
+    name, which is then given the decoded request body, or None.
+    """
+
+    try:
+        param = get_true_signature(method).parameters.get("body")
+    except (DecoratorCompatibilityError, TypeError, ValueError):
+        return None
+    if param is not None and param.kind == inspect.Parameter.KEYWORD_ONLY:
+        return "body"
+    return None
+
+
+def negotiate_representation(representations):
+    """Returns the mimetype in `representations` that best matches the
+    request's ``Accept`` header, the first one if it didn't send one, or
+    None if it accepts none of them.
+    """
+
+    if request.accept_mimetypes:
+        return request.accept_mimetypes.best_match(list(representations))
+    return next(iter(representations))
+
+
+def make_representing_view(view, representations, body_decoders, body_arg,
+                           is_async):
+    """Returns a view that decodes the request body into the `body_arg`
+    argument, if it is given, and serializes dict and list return values with
+    the serializer from `representations` that best matches the request's
+    ``Accept`` header.
+
+    A body whose mimetype has no decoder gets a 415 and one that fails to
+    decode gets a 400. A request that accepts none of the representations
+    gets a 406.
+    """
+
+    def decode_body(view_args):
+        view_args = dict(view_args)
+        data = request.get_data()
+        if not data:
+            view_args[body_arg] = None
+            return view_args
+        decoder = (body_decoders or {}).get(request.mimetype)
+        if decoder is None:
+            abort(415)
+        try:
+            view_args[body_arg] = decoder(data)
+        except ValueError:
+            abort(400)
+        return view_args
+
+    def represent(rv):
+        if not representations:
+            return rv
+        extra = ()
+        if isinstance(rv, tuple):
+            rv, extra = rv[0], rv[1:]
+        if not isinstance(rv, (dict, list)):
+            return (rv,) + extra if extra else rv
+
+        mimetype = negotiate_representation(representations)
+        if mimetype is None:
+            abort(406)
+
+        body = representations[mimetype](rv)
+        response = make_response((body,) + extra if extra else body)
+        response.mimetype = mimetype
+        if len(representations) > 1:
+            response.vary.add("Accept")
+        return response
+
+    if is_async:
+        async def representing_view(**view_args):
+            if body_arg is not None:
+                view_args = decode_body(view_args)
+            rv = view(**view_args)
+            if inspect.isawaitable(rv):
+                rv = await rv
+            return represent(rv)
+    else:
+        def representing_view(**view_args):
+            if body_arg is not None:
+                view_args = decode_body(view_args)
+            return represent(view(**view_args))
+
+    return representing_view
+
+
+def parse_bool(value):
+    value = value.lower() if isinstance(value, str) else value
+    if value in ("1", "true", "yes", "on", True, 1):
+        return True
+    if value in ("0", "false", "no", "off", "", False, 0):
+        return False
+    raise ValueError("not a boolean: %r" % value)
+
+
+# How query and body values are converted for keyword-only view arguments
+# annotated with each type. Any other class is called with the value.
+argument_converters = {
+    bool: parse_bool,
+    str: str,
+}
+
+
+def unwrap_optional(annotation):
+    """Returns ``X`` for an ``Optional[X]``, ``Union[X, None]`` or
+    ``X | None`` annotation, and any other annotation as it is.
+    """
+
+    union_type = getattr(types, "UnionType", None)
+    if getattr(annotation, "__origin__", None) is typing.Union \
+            or (union_type is not None and isinstance(annotation, union_type)):
+        type_args = [arg for arg in annotation.__args__ if arg is not type(None)]
+        if len(type_args) == 1:
+            return type_args[0]
+    return annotation
+
+
+def get_argument_binder(method):
+    """Returns the :class:`ArgumentBinder` for a view method's keyword-only
+    arguments, or None if it has none. Binders are built once per method.
+    """
+
+    try:
+        return _binder_cache[method]
+    except (KeyError, TypeError):
+        pass
+
+    try:
+        params = get_true_signature(method).parameters.values()
+    except (DecoratorCompatibilityError, TypeError, ValueError):
+        params = ()
+    bound = [param for param in params
+             if param.kind == inspect.Parameter.KEYWORD_ONLY
+             and param.name != "body"]
+    binder = ArgumentBinder(bound) if bound else None
+
+    try:
+        _binder_cache[method] = binder
+    except TypeError:
+        pass
+    return binder
+
+
+class ArgumentBinder(object):
+    """Binds keyword-only view arguments to values from the query string, or
+    failing that the form or JSON body, of the request. Each argument is
+    converted according to its annotation: a class found in
+    `argument_converters` is converted with what's found there, and any
+    other class is called with the value. ``List[...]`` arguments get every
+    value given, and ``Optional[...]`` is converted as what it wraps.
+    Arguments without a default are required.
+
+    Requests with missing or invalid arguments get a 400 with a JSON body
+    listing what was wrong with each argument.
+    """
+
+    def __init__(self, params):
+        self.params = tuple(self.compile(param) for param in params)
+
+    @staticmethod
+    def compile(param):
+        annotation = unwrap_optional(param.annotation)
+        many = getattr(annotation, "__origin__", None) in (list, collections.abc.Sequence)
+        if many:
+            type_args = getattr(annotation, "__args__", None) or (str,)
+            annotation = type_args[0]
+        if annotation is inspect.Parameter.empty:
+            annotation = str
+        convert = argument_converters.get(annotation)
+        if convert is None:
+            convert = annotation if callable(annotation) else str
+        return (param.name, convert, many, getattr(annotation, "__name__", "value"),
+                param.default)
+
+    def bind(self, view_args):
+        """Returns `view_args` with the bound arguments added, or aborts with
+        a 400.
+        """
+
+        query = request.args
+        form = request.form
+        data = request.get_json(silent=True) if request.is_json else None
+        if not isinstance(data, dict):
+            data = {}
+
+        view_args = dict(view_args)
+        errors = []
+        for name, convert, many, type_name, default in self.params:
+            if name in query:
+                source = "query"
+                values = query.getlist(name) if many else query[name]
+            elif name in form:
+                source = "form"
+                values = form.getlist(name) if many else form[name]
+            elif name in data:
+                source = "body"
+                values = data[name]
+                if many and not isinstance(values, list):
+                    values = [values]
+            elif default is not inspect.Parameter.empty:
+                view_args[name] = default
+                continue
+            else:
+                errors.append({"name": name, "error": "missing"})
+                continue
+
+            try:
+                if many:
+                    view_args[name] = [convert(value) for value in values]
+                else:
+                    view_args[name] = convert(values)
+            except (TypeError, ValueError):
+                errors.append({"name": name, "in": source,
+                               "error": "expected %s" % type_name})
+
+        if errors:
+            abort(Response(dumps_json({"errors": errors}), status=400,
+                           mimetype=JSON_MIMETYPE))
+        return view_args
+
+    def vary(self):
+        """Returns the query values of the bound arguments, for cache keys."""
+
+        return [request.args.getlist(name) for name, _, _, _, _ in self.params]
+
+    def wrap_view(self, view, is_async):
+        """Returns `view` wrapped so it's called with the bound arguments."""
+
+        if is_async:
+            async def binding_view(**view_args):
+                rv = view(**self.bind(view_args))
+                if inspect.isawaitable(rv):
+                    rv = await rv
+                return rv
+        else:
+            def binding_view(**view_args):
+                return view(**self.bind(view_args))
+
+        return binding_view
+
+
+def combine_vary(*functions):
+    """Returns a function for the `vary` argument of :meth:`CachePolicy.key`
+    and :meth:`RequestCoalescer.key` that returns what each of `functions`
+    returns. Functions that are None are left out, and if they all are
+    None is returned.
+    """
+
+    functions = tuple(function for function in functions if function is not None)
+    if not functions:
+        return None
+    if len(functions) == 1:
+        return functions[0]
+    return lambda: tuple(function() for function in functions)
+
+
+def make_view_pipeline(view, before_hooks, after_hooks, is_async):
+    """Returns a view that runs `before_hooks`, `view` and `after_hooks` and
+    always returns a response, even when a before hook returns something
+    else.
+    """
+
+    def to_response(rv):
+        if isinstance(rv, Response):
+            return rv
+        return make_response(rv)
+
+    if is_async:
+        async def pipeline(**view_args):
+            return to_response(
+                await dispatch_view_async(view, before_hooks, after_hooks))
+    else:
+        def pipeline(**view_args):
+            return to_response(dispatch_view(view, before_hooks, after_hooks))
+
+    return pipeline
+
+
+def make_conditional_view(view, etag, etag_hook, is_async):
+    """Returns a view that answers conditional ``GET`` and ``HEAD`` requests.
+
+    If `etag_hook` is given it is called with the view arguments before the
+    view. When it returns an ETag that matches the request's
+    ``If-None-Match`` header a 304 response is returned without calling the
+    view; otherwise the ETag is set on the view's response, if it is a
+    successful one. If `etag` is
+    ``"weak"`` the ETag is weak and matched weakly.
+
+    Any other true value of `etag` makes the response get a strong ETag
+    computed from its body, if it doesn't have one already. Responses are
+    then made conditional, so they become 304s if they match the request's
+    ``If-None-Match`` or ``If-Modified-Since`` headers.
+    """
+
+    weak = etag == "weak"
+
+    def precondition(tag):
+        if weak:
+            return request.if_none_match.contains_weak(tag)
+        return request.if_none_match.contains(tag)
+
+    def not_modified(tag):
+        response = Response(status=304)
+        response.set_etag(tag, weak)
+        return response
+
+    def finish(response, tag):
+        if tag is not None and 200 <= response.status_code < 300 \
+                and "ETag" not in response.headers:
+            response.set_etag(tag, weak)
+        elif etag and response.status_code == 200 and not response.is_streamed \
+                and not response.direct_passthrough:
+            response.add_etag(weak=weak)
+        return response.make_conditional(request)
+
+    if is_async:
+        async def conditional_view(**view_args):
+            if request.method not in ("GET", "HEAD"):
+                return await view(**view_args)
+            tag = None
+            if etag_hook is not None:
+                tag = etag_hook(**view_args)
+                if inspect.isawaitable(tag):
+                    tag = await tag
+                if tag is not None and precondition(tag):
+                    return not_modified(tag)
+            return finish(await view(**view_args), tag)
+    else:
+        def conditional_view(**view_args):
+            if request.method not in ("GET", "HEAD"):
+                return view(**view_args)
+            tag = None
+            if etag_hook is not None:
+                tag = etag_hook(**view_args)
+                if tag is not None and precondition(tag):
+                    return not_modified(tag)
+            return finish(view(**view_args), tag)
+
+    return conditional_view
+
+
+def get_view_options(method, name):
+    """Returns the options given to @route for a method that configure how
+    the view is called (see `VIEW_OPTIONS`). If the method has several
+    routes that disagree, the route closest to the method wins.
+    """
+
+    options = {}
+    rule_cache = getattr(method, "_rule_cache", None) or {}
+    for rule, rule_options in reversed(rule_cache.get(name, [])):
+        for key in VIEW_OPTIONS:
+            if key in rule_options:
+                options[key] = rule_options[key]
+    return options
+
+
+def release_after(response, instances, entry):
+    """Gives an instance back to its provider once `response` is done with
+    it. A streamed response may still be running view code, so the instance
+    is only released when the response is closed.
+    """
+
+    if isinstance(response, Response) and response.is_streamed:
+        response.call_on_close(functools.partial(instances.release, entry))
+    else:
+        instances.release(entry)
+
+
+def make_lazy_proxy(cls, name, shared_instance=None):
+    """Returns a placeholder for the proxy of the view called `name` on a
+    FlaskView subclass. The real proxy is made, under a lock, by the first
+    request that reaches the placeholder.
+    """
+
+    lock = threading.Lock()
+    built = []
+
+    def get_proxy():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(cls.make_proxy_method(
+                        name, shared_instance=shared_instance))
+        return built[0]
+
+    if is_async_view(cls, name):
+        @functools.wraps(getattr(cls, name))
+        async def placeholder(**view_args):
+            return await get_proxy()(**view_args)
+    else:
+        @functools.wraps(getattr(cls, name))
+        def placeholder(**view_args):
+            return get_proxy()(**view_args)
+
+    return placeholder
+
+
+def is_async_view(cls, name):
+    """Returns True if the view called `name` on a FlaskView subclass, or any
+    of its wrapper methods, is a coroutine function.
+    """
+
+    for attr in ("before_request", "before_" + name, "etag_" + name, name,
+                 "after_" + name, "after_request"):
+        method = getattr(cls, attr, None)
+        if method is not None and inspect.iscoroutinefunction(inspect.unwrap(method)):
+            return True
+    return False
+
+
+def dispatch_view(view, before_hooks, after_hooks):
+    """Runs a view and its hooks for the current request."""
+
+    # Always use the global request object's view_args, because they
+    # can be modified by intervening function before an endpoint or
+    # wrapper gets called. This matches Flask's behavior.
+    for before_hook in before_hooks:
+        response = before_hook(**request.view_args)
+        if response is not None:
+            return response
+
+    response = view(**request.view_args)
+    if not isinstance(response, Response):
+        response = make_response(response)
+
+    for after_hook in after_hooks:
+        response = after_hook(response)
+
+    return response
+
+
+async def dispatch_view_async(view, before_hooks, after_hooks):
+    """Runs a view and its hooks for the current request, awaiting any of
+    them that return an awaitable.
+    """
+
+    for before_hook in before_hooks:
+        response = before_hook(**request.view_args)
+        if inspect.isawaitable(response):
+            response = await response
+        if response is not None:
+            return response
+
+    response = view(**request.view_args)
+    if inspect.isawaitable(response):
+        response = await response
+    if not isinstance(response, Response):
+        response = make_response(response)
+
+    for after_hook in after_hooks:
+        response = after_hook(response)
+        if inspect.isawaitable(response):
+            response = await response
+
+    return response
+
+
+def get_view_hooks(instance, name, wrap=None):
+    """Resolves the wrapper methods that apply to the view called `name` on a
+    FlaskView instance. Returns a tuple of before hooks and a tuple of after
+    hooks, in the order they should be called. Before hooks accept the view
+    arguments and after hooks accept the response.
+
+    If `wrap` is given, each hook is replaced by ``wrap(phase, hook)``, where
+    phase is one of ``before_request``, ``before_view``, ``after_view`` or
+    ``after_request``.
+    """
+
+    before_hooks, after_hooks = get_named_view_hooks(instance, name, wrap)
+    return (tuple(hook for phase, hook in before_hooks),
+            tuple(hook for phase, hook in after_hooks))
+
+
+def get_named_view_hooks(instance, name, wrap=None):
+    """Like :func:`get_view_hooks`, but returns lists of ``(phase, hook)``
+    tuples.
+    """
+
+    before_hooks = []
+    after_hooks = []
+
+    def add(hooks, phase, hook):
+        hooks.append((phase, hook if wrap is None else wrap(phase, hook)))
+
+    if hasattr(instance, "before_request"):
+        add(before_hooks, "before_request",
+            functools.partial(instance.before_request, name))
+
+    if hasattr(instance, "before_" + name):
+        add(before_hooks, "before_view", getattr(instance, "before_" + name))
+
+    if hasattr(instance, "after_" + name):
+        hook = getattr(instance, "after_" + name)
+        if getattr(hook, "_chunk_filter", False):
+            hook = make_chunk_filter_hook(hook)
+        add(after_hooks, "after_view", hook)
+
+    if hasattr(instance, "after_request"):
+        hook = functools.partial(instance.after_request, name)
+        if getattr(instance.after_request, "_chunk_filter", False):
+            hook = make_chunk_filter_hook(hook)
+        add(after_hooks, "after_request", hook)
+
+    return before_hooks, after_hooks
+
+
+def make_chunk_filter_hook(chunk_filter):
+    """Returns an after hook that applies `chunk_filter` to each chunk of a
+    response's body.
+    """
+
+    def hook(response):
+        if response.is_streamed:
+            response.response = _filter_chunks(response.iter_encoded(), chunk_filter)
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(chunk_filter(response.get_data()))
+        return response
+
+    return hook
+
+
+def _filter_chunks(chunks, chunk_filter):
+    for chunk in chunks:
+        chunk = chunk_filter(chunk)
+        if chunk:
+            yield chunk
+
+
+def get_true_signature(method):
+    """Drills through layers of decorators attempting to locate the actual
+    signature for the method. Signatures are remembered per function object,
+    so redefining a method on a class is enough to have it looked up again.
+    """
+
+    try:
+        return _signature_cache[method]
+    except (KeyError, TypeError):
+        pass
+
+    signature = _find_true_signature(method)
+    try:
+        _signature_cache[method] = signature
+    except TypeError:
+        # Not every callable can be weakly referenced.
+        pass
+    return signature
+
+
+def get_true_argspec(method):
+    """Deprecated, use :func:`get_true_signature` instead. Returns the
+    ``inspect.FullArgSpec`` of the method a view's decorators wrap.
+    """
+
+    warnings.warn("get_true_argspec is deprecated, use get_true_signature",
+                  DeprecationWarning, stacklevel=2)
+    params = list(get_true_signature(method).parameters.values())
+    positional = [p for p in params if p.kind in _RULE_ARG_KINDS]
+    keyword_only = [p for p in params if p.kind == inspect.Parameter.KEYWORD_ONLY]
+    return inspect.FullArgSpec(
+        args=[p.name for p in positional],
+        varargs=next((p.name for p in params
+                      if p.kind == inspect.Parameter.VAR_POSITIONAL), None),
+        varkw=next((p.name for p in params
+                    if p.kind == inspect.Parameter.VAR_KEYWORD), None),
+        defaults=tuple(p.default for p in positional
+                       if p.default is not p.empty) or None,
+        kwonlyargs=[p.name for p in keyword_only],
+        kwonlydefaults=dict((p.name, p.default) for p in keyword_only
+                            if p.default is not p.empty) or None,
+        annotations=dict((p.name, p.annotation) for p in params
+                         if p.annotation is not p.empty))
+
+
+def _find_true_signature(method):
+    # inspect.signature already follows __wrapped__, so this only has to
+    # walk closures for decorators that don't use functools.wraps.
+    signature = inspect.signature(method)
+    params = list(signature.parameters)
+    if params and params[0] == 'self':
+        return signature
+    if hasattr(method, '__func__'):
+        method = method.__func__
+    if getattr(method, '__closure__', None) is None:
+        raise DecoratorCompatibilityError
+
+    for cell in method.__closure__:
+        try:
+            inner_method = cell.cell_contents
+        except ValueError:
+            continue
+        if inner_method is method:
+            continue
+        if not inspect.isfunction(inner_method) \
+            and not inspect.ismethod(inner_method):
+            continue
+        try:
+            return _find_true_signature(inner_method)
+        except DecoratorCompatibilityError:
+            continue
+
+    raise DecoratorCompatibilityError
+
+
+def get_rule_args(method):
+    """Returns the names of the positional arguments of a view method, which
+    are the candidates for the rule's URL variables.
+    """
+
+    return tuple(name for name, converter in get_rule_params(method))
+
+
+def get_rule_params(method):
+    """Returns ``(name, converter)`` for each positional argument of a view
+    method, where converter is the one `url_converters` has for the
+    argument's annotation, or None.
+    """
+
+    return tuple((name, get_url_converter(param.annotation))
+                 for name, param in get_true_signature(method).parameters.items()
+                 if param.kind in _RULE_ARG_KINDS)
+
+
+def get_url_converter(annotation):
+    try:
+        return url_converters.get(annotation)
+    except TypeError:
+        # Unhashable annotations can't be in url_converters.
+        return None
+
+
+class _BoundInstance(object):
+    """A FlaskView instance along with one of its views, wrapped in the
+    class' decorators, and that view's before and after hooks. If an
+    :class:`_Instrument` is given the view and hooks are timed by it.
+
+    When the view is cached, coalesced or answers conditional requests, the
+    ``before_<name>`` hook, the view, the ``after_<name>`` hook and
+    compression are folded into a single view that returns a response,
+    leaving only ``before_request`` and ``after_request`` as hooks.
+    """
+
+    __slots__ = ("instance", "view", "before_hooks", "after_hooks", "state")
+
+    def __init__(self, instance, name, options=None, instrument=None,
+                 is_async=False, binder=None, coalescer=None):
+        options = options or {}
+        self.instance = instance
+        self.view = getattr(instance, name)
+        cache_policy = getattr(self.view, "_cache_policy", instance.classy_cache_policy)
+        etag = options.get("etag", instance.classy_etag)
+        etag_hook = getattr(instance, "etag_" + name, None)
+
+        if instance.decorators:
+            for decorator in instance.decorators:
+                self.view = decorator(self.view)
+
+        executor = options.get("executor", instance.classy_executor)
+        if executor is not None:
+            self.view = get_executor(executor).wrap_view(self.view, is_async)
+
+        method = getattr(type(instance), name)
+        body_arg = get_body_arg(method)
+        if instance.classy_representations or body_arg is not None:
+            self.view = make_representing_view(
+                self.view, instance.classy_representations,
+                instance.classy_body_decoders, body_arg, is_async)
+
+        if binder is not None:
+            self.view = binder.wrap_view(self.view, is_async)
+
+        if is_streaming_view(method, options):
+            self.view = make_streaming_view(self.view, is_async)
+
+        wrap = None
+        if instrument is not None:
+            self.view = instrument.wrap_view(self.view)
+            wrap = instrument.wrap
+
+        before_hooks, after_hooks = get_named_view_hooks(instance, name, wrap)
+
+        compress = options.get("compress", instance.classy_compress)
+        if compress is not None:
+            hook = compress.compress_response
+            after_hooks.insert(
+                len([h for h in after_hooks if h[0] == "after_view"]),
+                ("compress", hook if wrap is None else wrap("compress", hook)))
+
+        if cache_policy is not None or etag or etag_hook is not None \
+                or coalescer is not None:
+            self.view = make_view_pipeline(
+                self.view,
+                [hook for phase, hook in before_hooks if phase == "before_view"],
+                [hook for phase, hook in after_hooks
+                 if phase in ("after_view", "compress")],
+                is_async)
+            before_hooks = [h for h in before_hooks if h[0] == "before_request"]
+            after_hooks = [h for h in after_hooks if h[0] == "after_request"]
+
+            endpoint = instance.build_route_name(name)
+            # Responses are shared and cached compressed, once per encoding,
+            # representation and value of the arguments bound from the query.
+            representations = instance.classy_representations
+            vary = combine_vary(
+                compress.negotiate if compress is not None else None,
+                functools.partial(negotiate_representation, representations)
+                if representations and len(representations) > 1 else None,
+                binder.vary if binder is not None else None)
+            if coalescer is not None:
+                self.view = coalescer.wrap_view(endpoint, self.view, is_async, vary)
+            if cache_policy is not None:
+                self.view = cache_policy.wrap_view(endpoint, self.view, is_async,
+                                                   vary)
+            if etag or etag_hook is not None:
+                self.view = make_conditional_view(self.view, etag, etag_hook,
+                                                  is_async)
+
+        self.before_hooks = tuple(hook for phase, hook in before_hooks)
+        self.after_hooks = tuple(hook for phase, hook in after_hooks)
+        self.state = None
+
+
+class _LazyInstance(object):
+    """Creates an instance of a FlaskView subclass the first time one is
+    asked for, and hands out that same instance from then on.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.instance = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.instance is None:
+            with self.lock:
+                if self.instance is None:
+                    self.instance = self.cls()
+        return self.instance
+
+
+class _SharedInstance(object):
+    """Provides the same instance to every request."""
+
+    def __init__(self, instance, bind):
+        self.entry = bind(instance)
+
+    def acquire(self):
+        return self.entry
+
+    def release(self, entry):
+        pass
+
+
+class _InstancePerRequest(object):
+    """Provides a new instance to every request."""
+
+    def __init__(self, cls, bind):
+        self.cls = cls
+        self.bind = bind
+
+    def acquire(self):
+        return self.bind(self.cls())
+
+    def release(self, entry):
+        pass
+
+
+class _InstancePool(object):
+    """A bounded, thread safe free-list of instances of a FlaskView subclass.
+    Instances are reset to a deep copy of the attributes they had after
+    ``__init__`` when they are released, so a request that mutates a list or
+    dict made in ``__init__`` doesn't leave its changes to the next one.
+    """
+
+    def __init__(self, cls, bind, size):
+        self.cls = cls
+        self.bind = bind
+        self.size = size
+        self.free = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.free:
+                return self.free.pop()
+        entry = self.bind(self.cls())
+        entry.state = copy.deepcopy(entry.instance.__dict__)
+        return entry
+
+    def release(self, entry):
+        attrs = entry.instance.__dict__
+        attrs.clear()
+        attrs.update(copy.deepcopy(entry.state))
+        with self.lock:
+            if len(self.free) < self.size:
+                self.free.append(entry)
+
+
+def get_executor(executor):
+    """Returns `executor` if it is a :class:`ViewExecutor`, or the executor
+    registered in `executors` under that name, creating one with the
+    default settings if there is none yet.
+    """
+
+    if isinstance(executor, str):
+        if executor not in executors:
+            executors.setdefault(executor, ViewExecutor())
+        return executors[executor]
+    return executor
+
+
+class ViewExecutor(object):
+    """A bounded thread pool that FlaskView methods can be run on, so that a
+    blocking view doesn't tie up the thread, or event loop, handling the
+    request. Set a FlaskView's `classy_executor` attribute, or pass
+    ``executor=`` to @route, to either an instance or the name of one in
+    `executors`.
+
+    Only the view itself, along with the class' decorators, runs on the
+    pool. Hooks run where they always do.
+
+    :param max_workers: the number of threads in the pool.
+
+    :param max_queue: how many views may wait for a thread. Requests beyond
+                      that get a 503 with a ``Retry-After`` header. None
+                      means no limit.
+
+    :param timeout: seconds to wait for a view before giving up with a 504.
+                    A view still waiting for a thread is cancelled, but
+                    one that has started keeps running; Python threads
+                    can't be interrupted. None means wait forever.
+
+    :param retry_after: the ``Retry-After`` value sent with 503s.
+    """
+
+    def __init__(self, max_workers=8, max_queue=None, timeout=None, retry_after=1):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.pool = None
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def stats(self):
+        """Returns the pool's queue depth, busy threads, saturation (the
+        fraction of threads busy) and counts of completed, rejected and timed
+        out views.
+        """
+
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "saturation": float(self.running) / self.max_workers,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+    def submit(self, view, view_args):
+        """Queues `view` to be called with `view_args` in the current
+        request's context, and returns a future for its result.
+        """
+
+        with self.lock:
+            if self.max_queue is not None and self.queued >= self.max_queue:
+                self.rejected += 1
+                abort(Response(status=503, headers={"Retry-After": str(self.retry_after)}))
+            self.queued += 1
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        try:
+            future = self.pool.submit(copy_current_request_context(self.run),
+                                      view, view_args)
+        except BaseException:
+            self.dequeue()
+            raise
+        future.add_done_callback(self.cancelled)
+        return future
+
+    def dequeue(self):
+        with self.lock:
+            self.queued -= 1
+
+    def cancelled(self, future):
+        # A view cancelled before it started never reaches run.
+        if future.cancelled():
+            self.dequeue()
+
+    def run(self, view, view_args):
+        with self.lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return view(**view_args)
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.completed += 1
+
+    def timeout_expired(self):
+        with self.lock:
+            self.timed_out += 1
+        abort(504)
+
+    def wrap_view(self, view, is_async):
+        """Returns a view that runs `view` on this executor and waits for
+        it, without blocking the event loop if `is_async` is True.
+        """
+
+        if is_async:
+            async def offloaded_view(**view_args):
+                future = asyncio.wrap_future(self.submit(view, view_args))
+                try:
+                    rv = await asyncio.wait_for(future, self.timeout)
+                except asyncio.TimeoutError:
+                    self.timeout_expired()
+                if inspect.isawaitable(rv):
+                    rv = await rv
+                return rv
+        else:
+            def offloaded_view(**view_args):
+                future = self.submit(view, view_args)
+                try:
+                    return future.result(self.timeout)
+                except FutureTimeoutError:
+                    # Frees the view's place in the queue if it hasn't
+                    # started, as asyncio.wait_for does for async views.
+                    future.cancel()
+                    self.timeout_expired()
+
+        return offloaded_view
+
+
+class ConcurrencyLimiter(object):
+    """Limits how many requests to a view are handled at once. Requests past
+    `max_concurrency` wait for a slot, but only `max_queue` of them (or any
+    number, if it is None); the rest are shed right away with `status` (503
+    or 429) and a ``Retry-After`` header of `retry_after` seconds.
+
+    Set the `classy_max_concurrency` and `classy_max_queue` attributes of a
+    FlaskView, or pass them to @route, to have one made for each of its
+    methods. The limiters are kept in `concurrency_limiters` by class and
+    method name, so :func:`get_concurrency_stats` can report on them.
+    """
+
+    def __init__(self, max_concurrency, max_queue=0, status=503, retry_after=1):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.status = status
+        self.retry_after = retry_after
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+
+    def stats(self):
+        with self.lock:
+            return {"max_concurrency": self.max_concurrency,
+                    "max_queue": self.max_queue,
+                    "in_flight": self.in_flight,
+                    "waiting": self.waiting,
+                    "shed": self.shed}
+
+    def acquire(self):
+        """Takes a slot, waiting for one if the queue has room. Aborts with
+        the shed status if it doesn't.
+        """
+
+        if not self.slots.acquire(False):
+            with self.lock:
+                if self.max_queue is not None and self.waiting >= self.max_queue:
+                    self.shed += 1
+                    abort(Response(status=self.status,
+                                   headers={"Retry-After": str(self.retry_after)}))
+                self.waiting += 1
+            try:
+                self.slots.acquire()
+            finally:
+                with self.lock:
+                    self.waiting -= 1
+        with self.lock:
+            self.in_flight += 1
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def release_after(self, response):
+        if isinstance(response, Response) and response.is_streamed:
+            response.call_on_close(self.release)
+        else:
+            self.release()
+
+    def wrap(self, proxy, is_async):
+        """Returns `proxy` wrapped so it only runs while holding a slot."""
+
+        if is_async:
+            # Flask runs each async view in an event loop of its own, so
+            # waiting on the semaphore only holds up this request.
+            @functools.wraps(proxy)
+            async def limited_proxy(**view_args):
+                self.acquire()
+                try:
+                    response = await proxy(**view_args)
+                except BaseException:
+                    self.release()
+                    raise
+                self.release_after(response)
+                return response
+        else:
+            @functools.wraps(proxy)
+            def limited_proxy(**view_args):
+                self.acquire()
+                try:
+                    response = proxy(**view_args)
+                except BaseException:
+                    self.release()
+                    raise
+                self.release_after(response)
+                return response
+
+        return limited_proxy
+
+
+def get_concurrency_stats(view=None):
+    """Returns ``{endpoint: stats}`` for every :class:`ConcurrencyLimiter`,
+    or only those of the FlaskView class `view`, with each endpoint's
+    in-flight and waiting requests, how many were shed and its limits.
+    When classes in different modules have the same name, their endpoints
+    are prefixed with the module.
+    """
+
+    views = [view] if view is not None else list(concurrency_limiters.keys())
+    names = collections.Counter(cls.__name__ for cls in views)
+    stats = {}
+    for cls in views:
+        prefix = cls.__module__ + "." if names[cls.__name__] > 1 else ""
+        for name, limiter in list(concurrency_limiters.get(cls, {}).items()):
+            stats[prefix + cls.build_route_name(name)] = limiter.stats()
+    return stats
+
+
+class RateLimit(object):
+    """A token bucket rate limit for FlaskView methods. Set one as the
+    `classy_rate_limit` of a FlaskView to limit every view in the class, or
+    pass one to @route. Each client gets a bucket per endpoint holding up to
+    `burst` tokens, refilled at `rate` tokens every `per` seconds; a request
+    takes one, and is turned away with `status` and a ``Retry-After``
+    header when the bucket is empty. The check runs before anything else in
+    the proxy, so limited requests are cheap.
+
+    :param rate: tokens added to a bucket every `per` seconds.
+
+    :param per: the period of `rate`, in seconds.
+
+    :param burst: the most tokens a bucket holds. Defaults to `rate`.
+
+    :param key: a function returning the client a request is from. Defaults
+                to ``request.remote_addr``.
+
+    :param backend: where buckets are kept. Any object with a
+                    ``take(key, rate, capacity)`` method, which takes a token
+                    from the bucket `key` and returns ``(True, 0)``, or
+                    ``(False, seconds)`` with the seconds until one is
+                    available, will do. `rate` is in tokens per second.
+                    Defaults to an in-process :class:`TokenBuckets` of
+                    `maxsize` buckets.
+
+    :param status: the status sent to limited requests, 429 by default.
+    """
+
+    def __init__(self, rate, per=1.0, burst=None, key=None, backend=None,
+                 maxsize=65536, status=429):
+        self.rate = float(rate) / per
+        self.burst = burst if burst is not None else rate
+        self.client_key = key if key is not None else get_remote_addr
+        self.backend = backend if backend is not None else TokenBuckets(maxsize)
+        self.status = status
+        self.counters = {}
+
+    def stats(self):
+        """Returns ``{endpoint: {"allowed": n, "limited": n}}``."""
+
+        return dict((endpoint, {"allowed": counts[0], "limited": counts[1]})
+                    for endpoint, counts in self.counters.items())
+
+    def check(self, endpoint):
+        """Takes a token for the current request, aborting if there isn't
+        one.
+        """
+
+        counts = self.counters.get(endpoint)
+        if counts is None:
+            counts = self.counters.setdefault(endpoint, [0, 0])
+
+        allowed, wait = self.backend.take("%s|%s" % (endpoint, self.client_key()),
+                                          self.rate, self.burst)
+        if allowed:
+            counts[0] += 1
+            return
+        counts[1] += 1
+        abort(Response(status=self.status,
+                       headers={"Retry-After": str(max(1, int(math.ceil(wait))))}))
+
+    def wrap(self, endpoint, proxy, is_async):
+        """Returns `proxy` wrapped so it only runs if the client has a token."""
+
+        if is_async:
+            @functools.wraps(proxy)
+            async def rate_limited_proxy(**view_args):
+                self.check(endpoint)
+                return await proxy(**view_args)
+        else:
+            @functools.wraps(proxy)
+            def rate_limited_proxy(**view_args):
+                self.check(endpoint)
+                return proxy(**view_args)
+
+        return rate_limited_proxy
+
+
+def get_remote_addr():
+    return request.remote_addr
+
+
+class TokenBuckets(object):
+    """A thread safe, in-process backend for :class:`RateLimit`, holding at
+    most `maxsize` buckets. The least recently used one is dropped first,
+    which is the same as giving that client a full bucket.
+    """
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.buckets = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, capacity):
+        now = monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = [capacity, now]
+                if len(self.buckets) > self.maxsize:
+                    self.buckets.popitem(last=False)
+            else:
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                self.buckets.move_to_end(key)
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0
+            return False, (1 - bucket[0]) / rate
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CompressionPolicy(object):
+    """Describes how the responses of FlaskView methods are compressed. Set
+    one as the `classy_compress` attribute of a FlaskView, or pass one to
+    @route.
+
+    Responses are compressed after ``after_<name>`` and before
+    ``after_request``, with the encoding from `encodings` the request's
+    ``Accept-Encoding`` likes best. Only successful responses with one of
+    `mimetypes` are compressed, and only if they're at least `min_size`
+    bytes; streamed responses are compressed chunk by chunk as they're sent.
+    When the view is cached, the compressed responses are cached, so each
+    one is only compressed once per encoding.
+
+    :param min_size: the smallest body, in bytes, worth compressing.
+
+    :param mimetypes: the mimetypes that are compressed.
+
+    :param encodings: the encodings to use, in order of preference. Those
+                      needing a library that isn't installed (``brotli`` for
+                      ``br``, ``zstandard`` for ``zstd``) are left out.
+
+    :param level: the compression level, or None for each encoding's
+                  default.
+    """
+
+    default_mimetypes = ("text/html", "text/plain", "text/css", "text/csv",
+                         "text/xml", "application/json", "application/xml",
+                         "application/javascript", "image/svg+xml")
+
+    def __init__(self, min_size=500, mimetypes=default_mimetypes,
+                 encodings=("br", "zstd", "gzip"), level=None):
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+        self.encodings = [encoding for encoding in encodings
+                          if _is_encoding_available(encoding)]
+        self.level = level
+
+    def negotiate(self):
+        """Returns the encoding to use for the current request, or None."""
+
+        return request.accept_encodings.best_match(self.encodings)
+
+    def compress_response(self, response):
+        """Compresses `response` in place, if it should be, and returns it."""
+
+        if response.mimetype not in self.mimetypes:
+            return response
+        response.vary.add("Accept-Encoding")
+        if not 200 <= response.status_code < 300 or response.status_code == 204 \
+                or response.direct_passthrough \
+                or "Content-Encoding" in response.headers:
+            return response
+
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_chunks(
+                response.iter_encoded(), _make_compressor(encoding, self.level))
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            feed, finish = _make_compressor(encoding, self.level)
+            response.set_data(feed(data, False) + finish())
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def _is_encoding_available(encoding):
+    if encoding == "br":
+        return brotli is not None
+    if encoding == "zstd":
+        return zstandard is not None
+    return encoding == "gzip"
+
+
+def _make_compressor(encoding, level=None):
+    """Returns a ``feed(chunk, flush)`` function, returning the compressed
+    chunk (flushed so the client can decode it right away if `flush` is
+    true), and a ``finish()`` function returning whatever is left.
+    """
+
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=4 if level is None else level)
+
+        def feed(chunk, flush):
+            data = compressor.process(chunk)
+            return data + compressor.flush() if flush else data
+        return feed, compressor.finish
+
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(
+            level=3 if level is None else level).compressobj()
+
+        def feed(chunk, flush):
+            data = compressor.compress(chunk)
+            if flush:
+                data += compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            return data
+        return feed, compressor.flush
+
+    # wbits of 31 writes a gzip header, without a timestamp.
+    compressor = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+
+    def feed(chunk, flush):
+        data = compressor.compress(chunk)
+        return data + compressor.flush(zlib.Z_SYNC_FLUSH) if flush else data
+    return feed, compressor.flush
+
+
+def _compress_chunks(chunks, compressor):
+    feed, finish = compressor
+    for chunk in chunks:
+        chunk = feed(chunk, True)
+        if chunk:
+            yield chunk
+    yield finish()
+
+
+def get_coalescer(coalesce):
+    """Returns the :class:`RequestCoalescer` for a view's `coalesce` option,
+    which is either one, True for a new one, or None.
+    """
+
+    if coalesce is True:
+        return RequestCoalescer()
+    return coalesce or None
+
+
+class RequestCoalescer(object):
+    """Lets only one request at a time compute the response to identical
+    ``GET`` and ``HEAD`` requests to a view. Requests that come in while it's
+    being computed wait for it, and get a copy of the same response, or the
+    same exception. Set the `classy_coalesce` attribute of a FlaskView, or the
+    @route option, to True or to one of these.
+
+    Like with caching, the class' decorators, ``before_<name>``, the view
+    and ``after_<name>`` only run for the request doing the work. Streamed
+    responses can't be shared, so waiting requests compute their own.
+
+    :param timeout: seconds to wait for a response before giving up with a
+                    504.
+
+    :param vary_on_headers: names of request headers that must match too,
+                            so requests from different users aren't
+                            mixed up.
+    """
+
+    def __init__(self, timeout=10, vary_on_headers=("Authorization", "Cookie")):
+        self.timeout = timeout
+        self.vary_on_headers = tuple(vary_on_headers)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.counters = {}
+
+    def stats(self):
+        """Returns ``{endpoint: {"calls": n, "coalesced": n,
+        "timeouts": n}}``, where calls is how many times the view ran.
+        """
+
+        return dict((endpoint, {"calls": counts[0], "coalesced": counts[1],
+                                "timeouts": counts[2]})
+                    for endpoint, counts in self.counters.items())
+
+    def key(self, endpoint, vary=None):
+        """Returns the key identical requests share, or None if the current
+        request shouldn't be coalesced.
+        """
+
+        if request.method not in ("GET", "HEAD"):
+            return None
+        parts = (endpoint, request.method, request.host, request.path,
+                 request.query_string,
+                 sorted((request.view_args or {}).items()),
+                 [request.headers.get(header) for header in self.vary_on_headers])
+        if vary is not None:
+            parts += (vary(),)
+        return repr(parts)
+
+    def join(self, endpoint, key):
+        """Returns the :class:`_Flight` for `key` and whether the current
+        request leads it.
+        """
+
+        counts = self.counters.get(endpoint)
+        if counts is None:
+            counts = self.counters.setdefault(endpoint, [0, 0, 0])
+
+        with self.lock:
+            flight = self.in_flight.get(key)
+            if flight is None:
+                flight = self.in_flight[key] = _Flight()
+                counts[0] += 1
+                return flight, True
+            counts[1] += 1
+            return flight, False
+
+    def land(self, key, flight, response=None, error=None):
+        if response is not None and not response.is_streamed \
+                and not response.direct_passthrough:
+            flight.result = (response.status_code, list(response.headers.items()),
+                             response.get_data())
+        flight.error = error
+        with self.lock:
+            del self.in_flight[key]
+        flight.done.set()
+
+    def follow(self, endpoint, flight):
+        """Waits for `flight` and returns a copy of its response, or None if
+        it can't be shared.
+        """
+
+        if not flight.done.wait(self.timeout):
+            self.counters[endpoint][2] += 1
+            abort(504)
+        if flight.error is not None:
+            raise flight.error
+        if flight.result is None:
+            return None
+        status, headers, body = flight.result
+        return Response(body, status=status, headers=headers)
+
+    def wrap_view(self, endpoint, view, is_async, vary=None):
+        """Returns a view that coalesces calls to `view`, which must return a
+        response. `vary` is passed on to :meth:`key`.
+        """
+
+        if is_async:
+            async def coalescing_view(**view_args):
+                key = self.key(endpoint, vary)
+                if key is None:
+                    return await view(**view_args)
+                flight, leader = self.join(endpoint, key)
+                if leader:
+                    try:
+                        response = await view(**view_args)
+                    except BaseException as e:
+                        self.land(key, flight, error=e)
+                        raise
+                    self.land(key, flight, response)
+                    return response
+                # Flask runs each async view in an event loop of its own, so
+                # waiting here only holds up this request.
+                response = self.follow(endpoint, flight)
+                if response is None:
+                    response = await view(**view_args)
+                return response
+        else:
+            def coalescing_view(**view_args):
+                key = self.key(endpoint, vary)
+                if key is None:
+                    return view(**view_args)
+                flight, leader = self.join(endpoint, key)
+                if leader:
+                    try:
+                        response = view(**view_args)
+                    except BaseException as e:
+                        self.land(key, flight, error=e)
+                        raise
+                    self.land(key, flight, response)
+                    return response
+                response = self.follow(endpoint, flight)
+                if response is None:
+                    response = view(**view_args)
+                return response
+
+        return coalescing_view
+
+
+class _Flight(object):
+    """A response being computed by a :class:`RequestCoalescer`."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class CachePolicy(object):
+    """Describes how the responses of FlaskView methods are cached. Set one
+    as the `classy_cache_policy` of a FlaskView to cache every view in the
+    class, or use the :func:`cached` decorator on a single method.
+
+    Only successful responses to ``GET`` and ``HEAD`` requests are cached,
+    and never ones that set a cookie or are streamed. Responses are keyed on
+    the endpoint, host, path and view arguments, plus the query arguments
+    and headers named in `vary_on` and `vary_on_headers`. Query values of
+    a view's keyword-only arguments are added to the key automatically.
+
+    On a hit the stored response is returned right after ``before_request``.
+    The class' decorators, ``before_<name>``, the view and ``after_<name>``
+    are all skipped, so anything that has to run on every request, like
+    authentication, belongs in ``before_request``.
+
+    :param ttl: seconds a response stays fresh, or None to keep it until
+                it is evicted.
+
+    :param maxsize: the number of responses the default backend holds.
+
+    :param vary_on: names of query arguments that are part of the key.
+
+    :param vary_on_headers: names of request headers that are part of the
+                            key. Defaults to the ones that tell users apart,
+                            so one user's response isn't served to another;
+                            keep them if you give your own.
+
+    :param backend: where responses are stored. Any object with
+                    ``get(key)``, returning None on a miss, and
+                    ``set(key, value, ttl)`` methods will do. Keys are
+                    strings and values are picklable. Defaults to an
+                    in-process :class:`LRUCache` of `maxsize` entries.
+    """
+
+    cacheable_methods = ("GET", "HEAD")
+
+    def __init__(self, ttl=None, maxsize=1024, vary_on=(),
+                 vary_on_headers=("Authorization", "Cookie"), backend=None):
+        self.ttl = ttl
+        self.vary_on = tuple(vary_on)
+        self.vary_on_headers = tuple(vary_on_headers)
+        self.backend = backend if backend is not None else LRUCache(maxsize)
+        self.counters = {}
+
+    def stats(self):
+        """Returns ``{endpoint: {"hits": n, "misses": n}}``."""
+
+        return dict((endpoint, {"hits": counts[0], "misses": counts[1]})
+                    for endpoint, counts in self.counters.items())
+
+    def key(self, endpoint, vary=None):
+        """Returns the cache key for the current request, or None if its
+        response shouldn't be cached. If `vary` is given, what it returns is
+        part of the key too.
+        """
+
+        if request.method not in self.cacheable_methods:
+            return None
+        parts = (endpoint, request.host, request.path,
+                 sorted((request.view_args or {}).items()),
+                 [request.args.getlist(arg) for arg in self.vary_on],
+                 [request.headers.get(header) for header in self.vary_on_headers])
+        if vary is not None:
+            parts += (vary(),)
+        return repr(parts)
+
+    def load(self, endpoint, key):
+        counts = self.counters.get(endpoint)
+        if counts is None:
+            counts = self.counters.setdefault(endpoint, [0, 0])
+
+        stored = self.backend.get(key)
+        if stored is None:
+            counts[1] += 1
+            return None
+
+        counts[0] += 1
+        status, headers, body = stored
+        return Response(body, status=status, headers=headers)
+
+    def store(self, key, response):
+        if response.status_code != 200 or response.is_streamed \
+                or response.direct_passthrough or "Set-Cookie" in response.headers:
+            return
+        self.backend.set(key, (response.status_code,
+                               list(response.headers.items()),
+                               response.get_data()), self.ttl)
+
+    def wrap_view(self, endpoint, view, is_async, vary=None):
+        """Returns a view that serves stored responses, and otherwise calls
+        `view`, which must return a response, and stores what it returns.
+        `vary` is passed on to :meth:`key`.
+        """
+
+        if is_async:
+            async def cached_view(**view_args):
+                key = self.key(endpoint, vary)
+                if key is not None:
+                    response = self.load(endpoint, key)
+                    if response is not None:
+                        return response
+                response = await view(**view_args)
+                if key is not None:
+                    self.store(key, response)
+                return response
+        else:
+            def cached_view(**view_args):
+                key = self.key(endpoint, vary)
+                if key is not None:
+                    response = self.load(endpoint, key)
+                    if response is not None:
+                        return response
+                response = view(**view_args)
+                if key is not None:
+                    self.store(key, response)
+                return response
+
+        return cached_view
+
+
+class LRUCache(object):
+    """A thread safe, in-process cache backend holding at most `maxsize`
+    entries, evicting the least recently used one first.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = monotonic() + ttl if ttl is not None else None
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class ViewProfiler(object):
+    """Profiles one in every `sample_every` requests to each endpoint of the
+    FlaskView classes it is set as the `classy_profiler` of, adding up the
+    results per endpoint until they are dumped with :meth:`dump`.
+
+    :param sample_every: profile one request in this many, per endpoint.
+
+    :param mode: ``"cprofile"`` to run sampled requests under cProfile and
+                 dump pstats files, or ``"stack"`` to have a background
+                 thread sample their stacks every `interval` seconds and dump
+                 collapsed stacks, as read by flamegraph.pl and speedscope.
+                 Stack sampling costs less but misses short calls.
+
+    :param directory: where :meth:`dump` writes files by default.
+    """
+
+    def __init__(self, sample_every=100, mode="cprofile", interval=0.005,
+                 directory="."):
+        if mode not in ("cprofile", "stack"):
+            raise ValueError("mode must be 'cprofile' or 'stack', not %r" % mode)
+        self.sample_every = sample_every
+        self.mode = mode
+        self.interval = interval
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.profiles = {}
+        self.stacks = {}
+        self.sampling = {}
+        self.sampler = None
+
+    def should_sample(self, endpoint):
+        counter = self.counters.get(endpoint)
+        if counter is None:
+            counter = self.counters.setdefault(endpoint, itertools.count())
+        return next(counter) % self.sample_every == 0
+
+    def start(self, endpoint):
+        """Starts profiling the current thread for `endpoint`, returning
+        what :meth:`stop` needs to finish. In ``"cprofile"`` mode a request
+        isn't profiled if another one already is, or if some other tool is
+        profiling the process.
+        """
+
+        if self.mode == "cprofile":
+            if not _cprofile_lock.acquire(blocking=False):
+                return None
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                _cprofile_lock.release()
+                return None
+            return profile
+
+        thread_id = threading.get_ident()
+        with self.lock:
+            self.sampling[thread_id] = endpoint
+            if self.sampler is None:
+                self.sampler = threading.Thread(target=self.sample_stacks,
+                                                name="ViewProfiler", daemon=True)
+                self.sampler.start()
+        return thread_id
+
+    def stop(self, endpoint, token):
+        if token is None:
+            return
+        if self.mode == "cprofile":
+            token.disable()
+            _cprofile_lock.release()
+            with self.lock:
+                stats = self.profiles.get(endpoint)
+                if stats is None:
+                    self.profiles[endpoint] = pstats.Stats(token)
+                else:
+                    stats.add(token)
+        else:
+            with self.lock:
+                self.sampling.pop(token, None)
+
+    def sample_stacks(self):
+        while True:
+            with self.lock:
+                if not self.sampling:
+                    self.sampler = None
+                    return
+                frames = sys._current_frames()
+                for thread_id, endpoint in self.sampling.items():
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    stack = ";".join(reversed(list(_frame_labels(frame))))
+                    counts = self.stacks.setdefault(endpoint, collections.Counter())
+                    counts[stack] += 1
+            sleep(self.interval)
+
+    def wrap(self, endpoint, proxy, is_async):
+        """Returns `proxy` wrapped so sampled requests are profiled."""
+
+        if is_async:
+            @functools.wraps(proxy)
+            async def profiled_proxy(**view_args):
+                if not self.should_sample(endpoint):
+                    return await proxy(**view_args)
+                token = self.start(endpoint)
+                try:
+                    return await proxy(**view_args)
+                finally:
+                    self.stop(endpoint, token)
+        else:
+            @functools.wraps(proxy)
+            def profiled_proxy(**view_args):
+                if not self.should_sample(endpoint):
+                    return proxy(**view_args)
+                token = self.start(endpoint)
+                try:
+                    return proxy(**view_args)
+                finally:
+                    self.stop(endpoint, token)
+
+        return profiled_proxy
+
+    def dump(self, directory=None, reset=True):
+        """Writes a ``<endpoint>.pstats`` or ``<endpoint>.collapsed`` file for
+        each endpoint profiled so far to `directory`, and returns their
+        paths. Unless `reset` is false, the results are then thrown away.
+        """
+
+        directory = directory or self.directory
+        with self.lock:
+            profiles, stacks = self.profiles, self.stacks
+            if reset:
+                self.profiles, self.stacks = {}, {}
+
+        paths = []
+        for endpoint, stats in profiles.items():
+            path = os.path.join(directory, _safe_filename(endpoint) + ".pstats")
+            stats.dump_stats(path)
+            paths.append(path)
+        for endpoint, counts in stacks.items():
+            path = os.path.join(directory, _safe_filename(endpoint) + ".collapsed")
+            with open(path, "w") as f:
+                for stack, count in sorted(counts.items()):
+                    f.write("%s %d\n" % (stack, count))
+            paths.append(path)
+        return paths
+
+    def dump_on_signal(self, signum=getattr(signal, "SIGUSR2", None)):
+        """Has :meth:`dump` called whenever the process gets `signum`. Must
+        be called from the main thread.
+        """
+
+        def handler(signum, frame):
+            # The signal may arrive while the main thread holds self.lock,
+            # so the dump can't run in the handler itself.
+            threading.Thread(target=self.dump, name="ViewProfiler.dump",
+                             daemon=True).start()
+
+        signal.signal(signum, handler)
+
+
+def _frame_labels(frame):
+    while frame is not None:
+        code = frame.f_code
+        yield "%s (%s:%d)" % (code.co_name, os.path.basename(code.co_filename),
+                              code.co_firstlineno)
+        frame = frame.f_back
+
+
+def _safe_filename(name):
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+class ViewMetrics(object):
+    """Collects how long each phase of handling a request takes, per
+    endpoint, in fixed bucket histograms. Assign an instance to the
+    `classy_metrics` attribute of a FlaskView to have its proxies timed.
+
+    The phases are ``before_request``, ``before_view``, ``view``,
+    ``make_response``, ``after_view``, ``compress``, ``after_request`` and
+    ``total``.
+
+    Recording takes no lock. Under heavy contention an observation can
+    occasionally be lost, which is a fine price for a histogram.
+
+    :param buckets: the upper bounds, in seconds, of the histogram buckets.
+    """
+
+    default_buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                       0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(sorted(buckets or self.default_buckets))
+        self.histograms = {}
+
+    def histogram(self, endpoint, phase):
+        """Returns the histogram for a phase of an endpoint, creating it if
+        needed.
+        """
+
+        key = (endpoint, phase)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms.setdefault(key, _Histogram(self.buckets))
+        return histogram
+
+    def summary(self):
+        """Returns ``{endpoint: {phase: stats}}``, where stats is a dict with
+        the count, sum, mean and the estimated p50, p90 and p99 in seconds.
+        """
+
+        result = {}
+        for (endpoint, phase), histogram in sorted(self.histograms.items()):
+            result.setdefault(endpoint, {})[phase] = histogram.stats()
+        return result
+
+    def prometheus(self, name="flask_classy_view_duration_seconds"):
+        """Returns the histograms in the Prometheus text exposition format."""
+
+        lines = ["# HELP %s Time spent in each phase of a FlaskView request." % name,
+                 "# TYPE %s histogram" % name]
+        for (endpoint, phase), histogram in sorted(self.histograms.items()):
+            labels = 'endpoint="%s",phase="%s"' % (_escape_label(endpoint), phase)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('%s_bucket{%s,le="%s"} %d' % (name, labels, le, cumulative))
+            lines.append("%s_sum{%s} %r" % (name, labels, histogram.sum))
+            lines.append("%s_count{%s} %d" % (name, labels, cumulative))
+        return "\n".join(lines) + "\n"
+
+
+class _Histogram(object):
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+
+    def stats(self):
+        counts = list(self.counts)
+        count = sum(counts)
+        return {
+            "count": count,
+            "sum": self.sum,
+            "mean": self.sum / count if count else 0.0,
+            "p50": self.quantile(counts, count, 0.5),
+            "p90": self.quantile(counts, count, 0.9),
+            "p99": self.quantile(counts, count, 0.99),
+        }
+
+    def quantile(self, counts, count, q):
+        # Reports the upper bound of the bucket the quantile falls in, or the
+        # largest bound for observations past it.
+        if not count:
+            return 0.0
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            if cumulative >= q * count:
+                return bound
+        return self.buckets[-1]
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Instrument(object):
+    """Wraps the parts of a single proxy so they are timed into a
+    :class:`ViewMetrics`.
+    """
+
+    def __init__(self, metrics, endpoint, is_async):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.is_async = is_async
+
+    def wrap(self, phase, func, wraps=False):
+        histogram = self.metrics.histogram(self.endpoint, phase)
+
+        if self.is_async:
+            async def timed(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    return result
+                finally:
+                    histogram.observe(perf_counter() - start)
+        else:
+            def timed(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(perf_counter() - start)
+
+        if wraps:
+            timed = functools.wraps(func)(timed)
+        return timed
+
+    def wrap_view(self, view):
+        """Times a view and the conversion of what it returns into a
+        response separately. The wrapped view always returns a response.
+        """
+
+        histogram = self.metrics.histogram(self.endpoint, "make_response")
+        timed_view = self.wrap("view", view)
+
+        def to_response(rv):
+            if isinstance(rv, Response):
+                return rv
+            start = perf_counter()
+            try:
+                return make_response(rv)
+            finally:
+                histogram.observe(perf_counter() - start)
+
+        if self.is_async:
+            async def view_response(**view_args):
+                return to_response(await timed_view(**view_args))
+        else:
+            def view_response(**view_args):
+                return to_response(timed_view(**view_args))
+
+        return view_response
+
+
+class RouteManifest(object):
+    """An on-disk record of the URL rules built for FlaskView classes, so
+    that other processes can register the same classes without inspecting
+    them again.
+
+    Rules are recorded per class and registration arguments, under a key
+    that includes a hash of the source files of the class and its bases.
+    Editing any of those files makes the old record unreachable and the
+    rules are built from scratch. Changes made to a class at runtime are
+    not noticed, so don't use a manifest for classes that are modified
+    after they are defined.
+
+    :param path: the file the manifest is read from and saved to. It does
+                 not have to exist yet.
+    """
+
+    format_version = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = self.load()
+        self.dirty = False
+        self.file_digests = {}
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.format_version:
+            return {}
+        return data.get("entries", {})
+
+    def save(self):
+        """Writes the manifest to its path, replacing the old file in one
+        step so concurrent readers never see half of it.
+        """
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": self.format_version,
+                           "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.dirty = False
+
+    def key(self, cls, app, args):
+        """Returns the key for registering `cls` on `app` with `args`, or
+        None if the source of the class can't be found.
+        """
+
+        parts = [__version__, cls.__module__, cls.__qualname__, repr(args),
+                 repr(getattr(app, "subdomain", None))]
+        for klass in cls.__mro__:
+            if klass in FlaskView.__mro__:
+                continue
+            digest = self.file_digest(klass.__module__)
+            if digest is None:
+                return None
+            parts.append(digest)
+        return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def file_digest(self, module_name):
+        if module_name not in self.file_digests:
+            path = getattr(sys.modules.get(module_name), "__file__", None)
+            try:
+                with open(path, "rb") as f:
+                    digest = hashlib.sha1(f.read()).hexdigest()
+            except (IOError, OSError, TypeError):
+                digest = None
+            self.file_digests[module_name] = digest
+        return self.file_digests[module_name]
+
+    def get(self, key):
+        if key is None:
+            return None
+        return self.entries.get(key)
+
+    def put(self, key, named_rules):
+        if key is None:
+            return
+        named_rules = [list(named_rule) for named_rule in named_rules]
+        try:
+            json.dumps(named_rules)
+        except (TypeError, ValueError):
+            # Options that can't be written as JSON can't be replayed.
+            return
+        self.entries[key] = named_rules
+        self.dirty = True
+
+
+_OPENAPI_CONVERTER_SCHEMAS = {
+    "int": {"type": "integer"},
+    "float": {"type": "number"},
+    "number": {"type": "number"},
+    "uuid": {"type": "string", "format": "uuid"},
+}
+
+_OPENAPI_TYPE_SCHEMAS = {
+    int: {"type": "integer"},
+    float: {"type": "number"},
+    bool: {"type": "boolean"},
+    str: {"type": "string"},
+    uuid.UUID: {"type": "string", "format": "uuid"},
+    dict: {"type": "object"},
+    list: {"type": "array"},
+}
+
+
+def openapi(views, title="API", version="1.0"):
+    """Returns an OpenAPI 3 document, as a dict, describing every route
+    registered for the FlaskView classes in `views`. Parameter, request body
+    and response schemas come from the view methods' annotations where there
+    are any.
+
+    The document is built from :func:`get_routes`, and only rebuilt
+    once those change, so it's cheap to call on every request. Don't modify
+    what it returns.
+    """
+
+    return _build_openapi(tuple((view, tuple(get_routes(view))) for view in views),
+                          title, version)
+
+
+@functools.lru_cache(maxsize=32)
+def _build_openapi(routes, title, version):
+    paths = {}
+    for view, records in routes:
+        for record in records:
+            path, operation = _build_openapi_operation(view, record)
+            operations = paths.setdefault(path, {})
+            for method in record.methods:
+                if method not in ("HEAD", "OPTIONS"):
+                    operations[method.lower()] = operation
+
+    return {"openapi": "3.0.3",
+            "info": {"title": title, "version": version},
+            "paths": paths}
+
+
+def _build_openapi_operation(view, record):
+    method = getattr(view, record.view_name)
+    try:
+        params = get_true_signature(method).parameters
+    except (DecoratorCompatibilityError, TypeError, ValueError):
+        params = {}
+
+    path = []
+    parameters = []
+    for converter, arguments, variable in parse_rule(record.rule):
+        if converter is None:
+            path.append(variable)
+            continue
+        path.append("{%s}" % variable)
+        schema = _OPENAPI_CONVERTER_SCHEMAS.get(converter)
+        if schema is None:
+            param = params.get(variable)
+            schema = _get_openapi_schema(param.annotation if param else None)
+        parameters.append({"name": variable, "in": "path", "required": True,
+                           "schema": schema or {"type": "string"}})
+
+    for name, param in params.items():
+        if param.kind != inspect.Parameter.KEYWORD_ONLY or name == "body":
+            continue
+        schema = _get_openapi_schema(param.annotation) or {"type": "string"}
+        parameters.append({"name": name, "in": "query",
+                           "required": param.default is inspect.Parameter.empty,
+                           "schema": schema})
+
+    operation = {"operationId": record.endpoint, "responses": {"200": {"description": "OK"}}}
+    doc = inspect.getdoc(method)
+    if doc:
+        operation["summary"] = doc.splitlines()[0]
+    if parameters:
+        operation["parameters"] = parameters
+
+    body_arg = get_body_arg(method)
+    if body_arg is not None:
+        schema = _get_openapi_schema(params[body_arg].annotation) or {}
+        operation["requestBody"] = {
+            "content": {JSON_MIMETYPE: {"schema": schema}}}
+
+    try:
+        returns = get_true_signature(method).return_annotation
+    except (DecoratorCompatibilityError, TypeError, ValueError):
+        returns = None
+    schema = _get_openapi_schema(returns)
+    if schema is not None:
+        operation["responses"]["200"]["content"] = {JSON_MIMETYPE: {"schema": schema}}
+
+    return "".join(path), operation
+
+
+def _get_openapi_schema(annotation):
+    """Returns the JSON schema for a type annotation, or None if it doesn't
+    map to one.
+    """
+
+    annotation = unwrap_optional(annotation)
+    origin = getattr(annotation, "__origin__", None)
+    if origin is not None:
+        schema = _OPENAPI_TYPE_SCHEMAS.get(origin)
+        if schema is not None and origin is list:
+            type_args = getattr(annotation, "__args__", None)
+            items = _get_openapi_schema(type_args[0]) if type_args else None
+            if items is not None:
+                schema = dict(schema, items=items)
+        return schema
+
+    try:
+        return _OPENAPI_TYPE_SCHEMAS.get(annotation)
+    except TypeError:
+        return None
+
+
+class DecoratorCompatibilityError(Exception):
+    pass
+
+
+class EndpointCollisionError(Exception):
     pass
 
 
@@ -0,0 +1,34 @@
+import inspect
+from flask import Flask
+from .view_classes import AsyncView
+from nose.tools import *
+
+app = Flask("async")
+AsyncView.register(app)
+
+client = app.test_client()
+
+
+def test_async_index():
+    resp = client.get("/async/")
+    eq_(b"Async Index", resp.data)
+
+
+def test_async_get_with_mixed_wrappers():
+    resp = client.get("/async/1234")
+    eq_(b"Get 1234 ab", resp.data)
+    eq_("yes", resp.headers["X-After-Get"])
+
+
+def test_async_before_request_returns():
+    resp = client.get("/async/stop")
+    eq_(b"Stopped", resp.data)
+
+
+def test_proxy_is_coroutine_function():
+    ok_(inspect.iscoroutinefunction(app.view_functions["AsyncView:index"]))
+
+
+def test_sync_method_on_async_view():
+    resp = client.get("/async/sync_method/")
+    eq_(b"Sync", resp.data)
@@ -0,0 +1,125 @@
+import json
+import threading
+from flask import Flask
+from flask_classy import BatchView
+from .view_classes import (BasicView, RepresentationsView, BeforeRequestReturnsView,
+                           LimitedStreamingView, ClientView)
+from nose.tools import *
+
+app = Flask("batch")
+BasicView.register(app)
+RepresentationsView.register(app)
+BeforeRequestReturnsView.register(app)
+LimitedStreamingView.register(app)
+ClientView.register(app)
+BatchView.register(app)
+
+
+class ParallelBatchView(BatchView):
+    classy_parallel = True
+    classy_max_workers = 4
+    classy_max_batch_size = 3
+
+
+ParallelBatchView.register(app)
+
+seen_threads = set()
+
+
+@app.before_request
+def record_thread():
+    seen_threads.add(threading.current_thread().name)
+
+
+@app.after_request
+def app_after_request(response):
+    response.headers["X-App-After"] = "yes"
+    return response
+
+
+client = app.test_client()
+
+
+def batch(path, sub_requests, **kwargs):
+    resp = client.post(path, data=json.dumps(sub_requests),
+                       content_type="application/json", **kwargs)
+    return resp, json.loads(resp.data) if resp.status_code == 200 else None
+
+
+def test_batch():
+    resp, results = batch("/batch/", [
+        {"path": "/basic/"},
+        {"method": "PUT", "path": "/basic/1234"},
+        {"path": "/representations/5"},
+        {"method": "POST", "path": "/representations/", "body": {"a": 1}},
+        {"path": "/beforerequestreturns/"},
+        {"path": "/missing/"},
+    ])
+    eq_(200, resp.status_code)
+    eq_([200, 200, 201, 200, 200, 404], [r["status"] for r in results])
+    eq_("Index", results[0]["body"])
+    eq_("Put 1234", results[1]["body"])
+    eq_({"id": "5"}, results[2]["body"])
+    eq_({"received": {"a": 1}}, results[3]["body"])
+    eq_("BEFORE", results[4]["body"])
+    eq_("yes", results[0]["headers"]["X-App-After"])
+
+
+def test_query_strings_and_headers():
+    resp, results = batch("/batch/", [
+        {"path": "/representations/?x=1", "headers": {"Accept": "text/csv"}},
+    ])
+    eq_("1,2\n3,4", results[0]["body"])
+
+
+def test_streamed_responses_are_closed():
+    resp, results = batch("/batch/", [{"path": "/limitedstreaming/"}] * 3)
+    eq_([200, 200, 200], [r["status"] for r in results])
+    eq_(["a,b,"] * 3, [r["body"] for r in results])
+    eq_(b"a,b,", client.get("/limitedstreaming/").data)
+
+
+def test_remote_addr_inherited():
+    resp, results = batch("/batch/", [{"path": "/client/address/"}] * 2,
+                          environ_base={"REMOTE_ADDR": "10.1.2.3"})
+    eq_(["10.1.2.3", "10.1.2.3"], [r["body"] for r in results])
+
+
+def test_globals_not_shared():
+    resp, results = batch("/batch/", [{"path": "/client/seen/"}] * 2)
+    eq_(["nothing", "nothing"], [r["body"] for r in results])
+
+
+def test_batch_of_batches_rejected():
+    resp, results = batch("/batch/", [{"method": "POST", "path": "/batch/", "body": []}])
+    eq_(400, results[0]["status"])
+
+
+def test_malformed_sub_requests():
+    resp, results = batch("/batch/", [
+        {"path": 5},
+        {"path": "/basic/", "method": 5},
+        {"path": "/basic/", "headers": ["Accept"]},
+        {"path": "/basic/", "headers": {"Accept": 5}},
+        "/basic/",
+        {"path": "/basic/"},
+    ])
+    eq_(200, resp.status_code)
+    eq_([400, 400, 400, 400, 400, 200], [r["status"] for r in results])
+
+
+def test_invalid_batch():
+    resp, results = batch("/batch/", {"path": "/basic/"})
+    eq_(400, resp.status_code)
+
+
+def test_parallel_batch():
+    seen_threads.clear()
+    resp, results = batch("/parallelbatch/", [{"path": "/basic/%d" % i} for i in range(3)])
+    eq_(["Get 0", "Get 1", "Get 2"], [r["body"] for r in results])
+    ok_(any(name.startswith("ThreadPoolExecutor") for name in seen_threads))
+
+
+def test_batch_too_large():
+    resp, results = batch("/parallelbatch/", [{"path": "/basic/"}] * 4)
+    eq_(413, resp.status_code)
@@ -0,0 +1,84 @@
+import json
+import sys
+from flask import Flask
+from flask_classy import FlaskView, get_argument_binder, openapi
+from .view_classes import SearchView
+from nose.tools import *
+
+app = Flask("binding")
+SearchView.register(app)
+
+client = app.test_client()
+
+
+def test_query():
+    resp = client.get("/search/?q=ducks&page=3&exact=yes&tags=a&tags=b")
+    eq_(b"ducks 3 True ['a', 'b']", resp.data)
+
+
+def test_defaults():
+    eq_(b"ducks 1 False []", client.get("/search/?q=ducks").data)
+
+
+def test_form_body():
+    resp = client.post("/search/", data={"name": "knob", "count": "2"})
+    eq_(b"knob 2", resp.data)
+
+
+def test_json_body():
+    resp = client.patch("/search/?name=knob", json={"name": "dial", "count": 4})
+    eq_(b"knob 4 ['count', 'name']", resp.data)
+
+
+def test_async_view():
+    resp = client.get("/search/ref/?ref=12345678-1234-5678-1234-567812345678")
+    eq_(b"Ref 12345678123456781234567812345678", resp.data)
+
+
+def test_errors_are_structured_400():
+    resp = client.get("/search/?page=two&exact=maybe")
+    eq_(400, resp.status_code)
+    eq_({"errors": [{"name": "q", "error": "missing"},
+                    {"name": "page", "in": "query", "error": "expected int"},
+                    {"name": "exact", "in": "query", "error": "expected bool"}]},
+        json.loads(resp.data))
+
+
+def test_optional():
+    eq_(b"Page 2", client.get("/search/page/?number=2").data)
+    eq_(b"Page None", client.get("/search/page/").data)
+    eq_(400, client.get("/search/page/?number=two").status_code)
+
+
+def test_pep_604_optional():
+    if sys.version_info < (3, 10):
+        return
+
+    class UnionSearchView(FlaskView):
+        def index(self, *, number: int | None = None):
+            return "Number %r" % number
+
+    union_app = Flask("binding_union")
+    UnionSearchView.register(union_app)
+    union_client = union_app.test_client()
+    eq_(b"Number 2", union_client.get("/unionsearch/?number=2").data)
+    eq_(b"Number None", union_client.get("/unionsearch/").data)
+
+
+def test_binder_is_built_once():
+    binder = get_argument_binder(SearchView.index)
+    ok_(binder is get_argument_binder(SearchView.index))
+    eq_(["q", "page", "exact", "tags"], [param[0] for param in binder.params])
+
+
+def test_openapi_query_parameters():
+    params = openapi([SearchView])["paths"]["/search/"]["get"]["parameters"]
+    eq_([("q", True), ("page", False), ("exact", False), ("tags", False)],
+        [(param["name"], param["required"]) for param in params])
+    eq_({"type": "array", "items": {"type": "string"}}, params[3]["schema"])
+
+
+def test_openapi_optional_parameter():
+    params = openapi([SearchView])["paths"]["/search/page/"]["get"]["parameters"]
+    eq_([("number", False, {"type": "integer"})],
+        [(param["name"], param["required"], param.get("schema")) for param in params])
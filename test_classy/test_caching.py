@@ -0,0 +1,111 @@
+from flask import Flask
+from flask_classy import LRUCache
+from .view_classes import CachedView, ClassCachedView, DeniedCachedView
+from nose.tools import *
+
+app = Flask("caching")
+CachedView.register(app)
+ClassCachedView.register(app)
+DeniedCachedView.register(app)
+
+client = app.test_client()
+
+
+def test_cached_response_reused():
+    first = client.get("/cached/")
+    second = client.get("/cached/")
+    eq_(first.data, second.data)
+
+
+def test_vary_on_query_arg():
+    first = client.get("/cached/?page=1")
+    other = client.get("/cached/?page=2")
+    ok_(first.data != other.data)
+    eq_(first.data, client.get("/cached/?page=1").data)
+    eq_(first.data, client.get("/cached/?page=1&ignored=1").data)
+
+
+def test_bound_arguments_are_part_of_the_key():
+    first = client.get("/cached/search/?q=knob")
+    ok_(first.data.startswith(b"Search knob"))
+    ok_(client.get("/cached/search/?q=dial").data.startswith(b"Search dial"))
+    eq_(first.data, client.get("/cached/search/?q=knob").data)
+
+
+def test_users_are_kept_apart():
+    first = client.get("/cached/", headers={"Authorization": "Bearer alice"})
+    other = client.get("/cached/", headers={"Authorization": "Bearer bob"})
+    ok_(first.data != other.data)
+    eq_(first.data, client.get("/cached/", headers={"Authorization": "Bearer alice"}).data)
+
+
+def test_view_args_are_part_of_the_key():
+    eq_(b"Cached Get 1", client.get("/cached/1").data[:12])
+    ok_(client.get("/cached/2").data.startswith(b"Cached Get 2"))
+
+
+def test_hit_skips_before_view():
+    client.get("/cached/3")
+    calls = CachedView.calls
+    client.get("/cached/3")
+    eq_(calls, CachedView.calls)
+
+
+def test_after_request_runs_on_hit():
+    client.get("/cached/")
+    resp = client.get("/cached/")
+    eq_("yes", resp.headers["X-After-Request"])
+
+
+def test_expired_entries_not_served():
+    ok_(client.get("/cached/expired/").data != client.get("/cached/expired/").data)
+
+
+def test_cookies_not_cached():
+    ok_(client.get("/cached/cookie/").data != client.get("/cached/cookie/").data)
+
+
+def test_uncached_method():
+    ok_(client.get("/cached/uncached/").data != client.get("/cached/uncached/").data)
+
+
+def test_class_policy_with_shared_backend():
+    first = client.get("/classcached/")
+    eq_(first.data, client.get("/classcached/").data)
+    eq_(1, len(ClassCachedView.classy_cache_policy.backend.store))
+
+
+def test_only_get_cached():
+    ok_(client.post("/classcached/").data != client.post("/classcached/").data)
+
+
+def test_stats():
+    client.get("/classcached/")
+    stats = ClassCachedView.classy_cache_policy.stats()["ClassCachedView:index"]
+    ok_(stats["hits"] >= 1)
+    eq_(1, stats["misses"])
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    eq_(1, cache.get("a"))
+    cache.set("c", 3)
+    eq_(None, cache.get("b"))
+    eq_(1, cache.get("a"))
+    eq_(3, cache.get("c"))
+
+
+def test_before_view_returning_a_value_is_cached():
+    for _ in range(2):
+        resp = client.get("/deniedcached/")
+        eq_(200, resp.status_code)
+        eq_(b"Denied", resp.data)
+
+
+def test_async_before_view_returning_a_value_is_cached():
+    for _ in range(2):
+        resp = client.get("/deniedcached/later/")
+        eq_(200, resp.status_code)
+        eq_(b"Denied later", resp.data)
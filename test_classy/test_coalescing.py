@@ -0,0 +1,69 @@
+import threading
+import time
+from flask import Flask
+from .view_classes import CoalescedView, DeniedCoalescedView, SLOW_COALESCER
+from nose.tools import *
+
+app = Flask("coalescing")
+app.config["PROPAGATE_EXCEPTIONS"] = False
+CoalescedView.register(app)
+DeniedCoalescedView.register(app)
+
+
+def herd(path, count, method="get"):
+    CoalescedView.gate.clear()
+    CoalescedView.calls = 0
+    results = []
+
+    def worker():
+        results.append(getattr(app.test_client(), method)(path))
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    CoalescedView.gate.set()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_identical_requests_share_one_call():
+    results = herd("/coalesced/a", 10)
+    eq_(1, CoalescedView.calls)
+    eq_([b"Value a 1"] * 10, [r.data for r in results])
+
+
+def test_different_arguments_are_not_coalesced():
+    CoalescedView.gate.set()
+    CoalescedView.calls = 0
+    client = app.test_client()
+    client.get("/coalesced/a")
+    client.get("/coalesced/b")
+    client.get("/coalesced/a?page=2")
+    eq_(3, CoalescedView.calls)
+
+
+def test_errors_propagate():
+    results = herd("/coalesced/broken", 5)
+    eq_(1, CoalescedView.calls)
+    eq_([500] * 5, [r.status_code for r in results])
+
+
+def test_post_is_not_coalesced():
+    herd("/coalesced/", 3, method="post")
+    eq_(3, CoalescedView.calls)
+
+
+def test_timeout_is_504():
+    results = herd("/coalesced/slow/", 3)
+    eq_(1, CoalescedView.calls)
+    eq_([200, 504, 504], sorted(r.status_code for r in results))
+    eq_({"calls": 1, "coalesced": 2, "timeouts": 2},
+        SLOW_COALESCER.stats()["CoalescedView:slow"])
+
+
+def test_before_view_returning_a_value_is_coalesced():
+    resp = app.test_client().get("/deniedcoalesced/")
+    eq_(200, resp.status_code)
+    eq_(b"Denied", resp.data)
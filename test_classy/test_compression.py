@@ -0,0 +1,78 @@
+import gzip
+import json
+from flask import Flask
+from .view_classes import CompressedView
+from nose.tools import *
+
+app = Flask("compression")
+CompressedView.register(app)
+
+client = app.test_client()
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def test_compresses_large_json():
+    resp = client.get("/compressed/", headers=GZIP)
+    eq_("gzip", resp.headers["Content-Encoding"])
+    ok_("Accept-Encoding" in resp.headers["Vary"])
+    eq_(100, len(json.loads(gzip.decompress(resp.data))))
+
+
+def test_runs_after_view_hook_and_before_after_request():
+    resp = client.get("/compressed/", headers=GZIP)
+    eq_(len(gzip.decompress(resp.data)), int(resp.headers["X-Seen-Length"]))
+    eq_("gzip", resp.headers["X-Encoding-Before-After-Request"])
+
+
+def test_honours_accept_encoding():
+    resp = client.get("/compressed/")
+    ok_("Content-Encoding" not in resp.headers)
+    eq_("Accept-Encoding", resp.headers["Vary"])
+
+    resp = client.get("/compressed/", headers={"Accept-Encoding": "gzip;q=0, br"})
+    ok_("Content-Encoding" not in resp.headers)
+
+
+def test_min_size():
+    resp = client.get("/compressed/small/", headers=GZIP)
+    ok_("Content-Encoding" not in resp.headers)
+    eq_({"tiny": True}, json.loads(resp.data))
+
+
+def test_mimetype_allowlist():
+    resp = client.get("/compressed/picture/", headers=GZIP)
+    ok_("Content-Encoding" not in resp.headers)
+    ok_("Vary" not in resp.headers)
+
+
+def test_streamed_body_is_compressed_by_chunk():
+    resp = client.get("/compressed/stream/", headers=GZIP, buffered=False)
+    ok_(resp.is_streamed)
+    eq_("gzip", resp.headers["Content-Encoding"])
+    chunks = list(resp.response)
+    ok_(len(chunks) > 1)
+    eq_(b"".join(("chunk %d " % i * 50).encode() for i in range(3)),
+        gzip.decompress(b"".join(chunks)))
+
+
+def test_route_can_turn_off():
+    resp = client.get("/compressed/plain/", headers=GZIP)
+    ok_("Content-Encoding" not in resp.headers)
+
+
+def test_cached_compressed_per_encoding():
+    CompressedView.renders = 0
+    first = client.get("/compressed/report/", headers=GZIP)
+    second = client.get("/compressed/report/", headers=GZIP)
+    plain = client.get("/compressed/report/")
+    eq_("gzip", second.headers["Content-Encoding"])
+    eq_(first.data, second.data)
+    eq_(b"report " * 200, plain.data)
+    ok_("Content-Encoding" not in plain.headers)
+    eq_(2, CompressedView.renders)
+
+
+def test_async_view():
+    resp = client.get("/compressed/later/", headers=GZIP)
+    eq_(b"later " * 200, gzip.decompress(resp.data))
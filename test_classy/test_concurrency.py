@@ -0,0 +1,119 @@
+import threading
+import time
+import flask_classy
+from flask import Flask
+from flask_classy import ConcurrencyLimiter, FlaskView
+from .view_classes import LimitedView, PoliteLimitedView
+from nose.tools import *
+
+app = Flask("concurrency")
+LimitedView.register(app)
+PoliteLimitedView.register(app)
+
+client = app.test_client()
+
+
+def flood(path, count):
+    LimitedView.gate.clear()
+    results = []
+
+    def worker():
+        results.append(app.test_client().get(path))
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+        time.sleep(0.1)
+
+    resp = client.get(path)
+    stats = flask_classy.get_concurrency_stats()
+    LimitedView.gate.set()
+    for t in threads:
+        t.join()
+    return resp, results, stats
+
+
+def test_sheds_past_queue():
+    resp, results, stats = flood("/limited/", 2)
+    eq_(503, resp.status_code)
+    eq_("3", resp.headers["Retry-After"])
+    eq_([200, 200], sorted(r.status_code for r in results))
+    eq_(1, stats["LimitedView:index"]["in_flight"])
+    eq_(1, stats["LimitedView:index"]["waiting"])
+    eq_(1, stats["LimitedView:index"]["shed"])
+
+
+def test_slots_are_released():
+    eq_(b"Done", client.get("/limited/").data)
+    stats = flask_classy.get_concurrency_stats()["LimitedView:index"]
+    eq_(0, stats["in_flight"])
+    eq_(0, stats["waiting"])
+
+
+def test_route_overrides_max_queue_on_async_view():
+    resp, results, stats = flood("/limited/impatient/", 1)
+    eq_(503, resp.status_code)
+    eq_([200], [r.status_code for r in results])
+    eq_(0, stats["LimitedView:impatient"]["max_queue"])
+
+
+def test_route_can_lift_limit():
+    eq_(b"Free", client.get("/limited/free/").data)
+    ok_("LimitedView:free" not in flask_classy.get_concurrency_stats())
+
+
+def test_shed_status():
+    limiter = flask_classy.concurrency_limiters[PoliteLimitedView]["index"]
+    limiter.acquire()
+    limiter.acquire()
+    try:
+        eq_(429, client.get("/politelimited/").status_code)
+    finally:
+        limiter.release()
+        limiter.release()
+    eq_(b"Polite", client.get("/politelimited/").data)
+
+
+def test_same_named_classes_get_their_own_limiters():
+    def make_view(module):
+        class SameNameView(FlaskView):
+            classy_max_concurrency = 1
+
+            def index(self):
+                return module
+
+        SameNameView.__module__ = module
+        return SameNameView
+
+    first, second = make_view("first"), make_view("second")
+    first_app, second_app = Flask("same_name_a"), Flask("same_name_b")
+    first.register(first_app)
+    second.register(second_app)
+    limiter = flask_classy.concurrency_limiters[first]["index"]
+    limiter.acquire()
+    try:
+        eq_(503, first_app.test_client().get("/samename/").status_code)
+        eq_(b"second", second_app.test_client().get("/samename/").data)
+        stats = flask_classy.get_concurrency_stats()
+        eq_(1, stats["first.SameNameView:index"]["in_flight"])
+        eq_(0, stats["second.SameNameView:index"]["in_flight"])
+        eq_(["SameNameView:index"], list(flask_classy.get_concurrency_stats(second)))
+    finally:
+        limiter.release()
+
+
+def test_unlimited_queue():
+    limiter = ConcurrencyLimiter(1, max_queue=None)
+    limiter.acquire()
+    waiters = [threading.Thread(target=limiter.acquire) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    time.sleep(0.1)
+    eq_(3, limiter.stats()["waiting"])
+    eq_(0, limiter.stats()["shed"])
+    for _ in range(4):
+        limiter.release()
+        time.sleep(0.05)
+    for waiter in waiters:
+        waiter.join()
+    eq_(0, limiter.stats()["waiting"])
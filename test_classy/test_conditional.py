@@ -0,0 +1,82 @@
+from flask import Flask
+from .view_classes import ETagView, ETagRouteView, DeniedETagView
+from nose.tools import *
+
+app = Flask("conditional")
+ETagView.register(app)
+ETagRouteView.register(app)
+DeniedETagView.register(app)
+
+client = app.test_client()
+
+
+def test_computed_etag():
+    resp = client.get("/etag/")
+    ok_(resp.headers["ETag"].startswith('"'))
+    eq_(b"ETag Index", resp.data)
+
+    resp = client.get("/etag/", headers={"If-None-Match": resp.headers["ETag"]})
+    eq_(304, resp.status_code)
+    eq_(b"", resp.data)
+
+
+def test_hook_short_circuits_view():
+    calls = ETagView.calls
+    resp = client.get("/etag/1", headers={"If-None-Match": '"v-1"'})
+    eq_(304, resp.status_code)
+    eq_('"v-1"', resp.headers["ETag"])
+    eq_(calls, ETagView.calls)
+
+
+def test_hook_etag_set_on_response():
+    resp = client.get("/etag/2", headers={"If-None-Match": '"v-1"'})
+    eq_(200, resp.status_code)
+    eq_('"v-2"', resp.headers["ETag"])
+    eq_(b"ETag Get 2", resp.data)
+
+
+def test_hook_etag_not_set_on_errors():
+    resp = client.get("/etag/missing")
+    eq_(404, resp.status_code)
+    ok_("ETag" not in resp.headers)
+
+
+def test_hook_returning_none_runs_view():
+    resp = client.get("/etag/unknown")
+    eq_(200, resp.status_code)
+    eq_(b"ETag Get unknown", resp.data)
+
+
+def test_weak_etag():
+    resp = client.get("/etag/weak/")
+    ok_(resp.headers["ETag"].startswith('W/"'))
+    resp = client.get("/etag/weak/", headers={"If-None-Match": resp.headers["ETag"]})
+    eq_(304, resp.status_code)
+
+
+def test_unsafe_methods_untouched():
+    resp = client.post("/etag/", headers={"If-None-Match": "*"})
+    eq_(200, resp.status_code)
+    ok_("ETag" not in resp.headers)
+
+
+def test_route_option():
+    resp = client.get("/etagroute/")
+    ok_("ETag" in resp.headers)
+    ok_("ETag" not in client.get("/etagroute/plain/").headers)
+
+
+def test_etag_option_not_passed_to_url_rule():
+    rule = [r for r in app.url_map.iter_rules() if r.endpoint == "ETagRouteView:index"][0]
+    ok_(not hasattr(rule, "etag"))
+
+
+def test_etag_hooks_not_routed():
+    ok_("ETagView:etag_get" not in app.view_functions)
+
+
+def test_before_view_returning_a_value_gets_an_etag():
+    resp = client.get("/deniedetag/")
+    eq_(200, resp.status_code)
+    eq_(b"Denied", resp.data)
+    ok_("ETag" in resp.headers)
@@ -0,0 +1,67 @@
+import flask_classy
+from flask import Blueprint, Flask
+from werkzeug.routing import BaseConverter
+from .view_classes import TypedView, Color
+from nose.tools import *
+
+
+class ColorConverter(BaseConverter):
+    regex = "(?:red|green|blue)"
+
+
+app = Flask("converters")
+app.url_map.converters["color"] = ColorConverter
+
+
+def setup_module():
+    flask_classy.url_converters[Color] = "color"
+    TypedView.register(app)
+
+
+def teardown_module():
+    del flask_classy.url_converters[Color]
+
+
+def get(path):
+    return app.test_client().get(path)
+
+
+def test_int():
+    eq_(b"Get 7", get("/typed/7").data)
+    eq_(b"Get -2", get("/typed/-2").data)
+    eq_(404, get("/typed/seven").status_code)
+
+
+def test_float():
+    eq_(b"Price 1.5", get("/typed/price/1.5").data)
+    eq_(b"Price 3.0", get("/typed/price/3").data)
+    eq_(b"Price -0.5", get("/typed/price/-0.5").data)
+    eq_(404, get("/typed/price/cheap").status_code)
+
+
+def test_number_converter_on_blueprint():
+    bp = Blueprint("typed_bp", __name__)
+    TypedView.register(bp)
+    bp_app = Flask("converters_bp")
+    bp_app.url_map.converters["color"] = ColorConverter
+    bp_app.register_blueprint(bp, url_prefix="/bp")
+    eq_(b"Price 3.0", bp_app.test_client().get("/bp/typed/price/3").data)
+
+
+def test_uuid():
+    eq_(b"Ref UUID", get("/typed/ref/12345678-1234-5678-1234-567812345678").data)
+    eq_(404, get("/typed/ref/nope").status_code)
+
+
+def test_path():
+    eq_(b"File a/b/c.txt", get("/typed/file/a/b/c.txt").data)
+
+
+def test_custom():
+    eq_(b"Paint red", get("/typed/paint/red").data)
+    eq_(404, get("/typed/paint/mauve").status_code)
+
+
+def test_unannotated_and_str():
+    eq_(b"Plain x", get("/typed/plain/x").data)
+    eq_("/typed/plain/<name>", TypedView.build_rule("/plain/", TypedView.plain))
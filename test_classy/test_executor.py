@@ -0,0 +1,81 @@
+import threading
+import time
+import flask_classy
+from flask import Flask
+from flask_classy import ViewExecutor
+from werkzeug.exceptions import HTTPException
+from .view_classes import OffloadedView, SaturatedView
+from nose.tools import *
+
+app = Flask("executor")
+OffloadedView.register(app)
+SaturatedView.register(app)
+
+client = app.test_client()
+
+
+def test_view_runs_on_pool_with_request_context():
+    eq_(b"True abc", client.get("/offloaded/?q=abc").data)
+
+
+def test_stats():
+    client.get("/offloaded/")
+    stats = OffloadedView.classy_executor.stats()
+    ok_(stats["completed"] >= 1)
+    eq_(0, stats["queued"])
+    eq_(2, stats["max_workers"])
+
+
+def test_timeout_is_504():
+    eq_(504, client.get("/offloaded/slow/").status_code)
+
+
+def test_timed_out_view_is_cancelled():
+    executor = ViewExecutor(max_workers=1, timeout=0.05)
+    gate = threading.Event()
+    calls = []
+    with app.test_request_context("/"):
+        executor.submit(lambda: gate.wait(5), {})
+        view = executor.wrap_view(lambda: calls.append(True), False)
+        try:
+            view()
+        except HTTPException as e:
+            eq_(504, e.code)
+        else:
+            ok_(False, "expected a 504")
+    gate.set()
+    executor.pool.shutdown(wait=True)
+    eq_([], calls)
+    eq_(0, executor.stats()["queued"])
+
+
+def test_async_view_on_pool():
+    eq_(b"Later", client.get("/offloaded/later/").data)
+
+
+def test_named_executor():
+    eq_(b"Named", client.get("/offloaded/named/").data)
+    ok_(flask_classy.executors["named-pool"].stats()["completed"] >= 1)
+
+
+def test_saturated_pool_is_503():
+    SaturatedView.gate.clear()
+    results = []
+
+    def worker():
+        results.append(app.test_client().get("/saturated/"))
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for t in threads:
+        t.start()
+        time.sleep(0.1)
+
+    resp = client.get("/saturated/")
+    SaturatedView.gate.set()
+    for t in threads:
+        t.join()
+
+    eq_(503, resp.status_code)
+    eq_("7", resp.headers["Retry-After"])
+    eq_([200, 200], sorted(r.status_code for r in results))
+    eq_(1, SaturatedView.classy_executor.stats()["rejected"])
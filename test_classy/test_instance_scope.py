@@ -0,0 +1,89 @@
+import threading
+from flask import Flask
+from .view_classes import (RequestScopeView, PooledView, PooledListView,
+                           InvalidScopeView, SharedScopeView, RouteScopeView)
+from nose.tools import *
+
+app = Flask("instance_scope")
+RequestScopeView.register(app)
+PooledView.register(app)
+PooledListView.register(app)
+
+client = app.test_client()
+
+
+def test_request_scope_isolates_state():
+    before = RequestScopeView.instances
+    eq_(b"index view", client.get("/requestscope/").data)
+    eq_(b"index view", client.get("/requestscope/").data)
+    eq_(before + 2, RequestScopeView.instances)
+
+
+def test_pooled_scope_resets_state():
+    eq_(b"init view", client.get("/pooled/").data)
+    eq_(b"init view", client.get("/pooled/").data)
+
+
+def test_pooled_scope_resets_mutated_attributes():
+    for _ in range(3):
+        eq_(b"1", client.get("/pooledlist/").data)
+
+
+def test_pooled_scope_reuses_instances():
+    client.get("/pooled/")
+    before = PooledView.instances
+    for _ in range(5):
+        client.get("/pooled/")
+    eq_(before, PooledView.instances)
+
+
+def test_pooled_scope_under_concurrency():
+    results = []
+
+    def worker():
+        c = app.test_client()
+        for _ in range(20):
+            results.append(c.get("/pooled/").data)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    eq_(80, len(results))
+    eq_(set([b"init view"]), set(results))
+
+
+@raises(ValueError)
+def test_invalid_scope():
+    InvalidScopeView.register(Flask("invalid_scope"))
+
+
+def test_shared_scope_one_instance_per_registration():
+    other = Flask("shared_scope")
+    before = SharedScopeView.instances
+    SharedScopeView.register(other)
+    eq_(before + 1, SharedScopeView.instances)
+
+    c = other.test_client()
+    ids = set([c.get("/sharedscope/").data, c.get("/sharedscope/1").data,
+               c.get("/sharedscope/custom/").data])
+    eq_(1, len(ids))
+
+    another = Flask("shared_scope_again")
+    SharedScopeView.register(another)
+    eq_(before + 2, SharedScopeView.instances)
+    ok_(another.test_client().get("/sharedscope/").data not in ids)
+
+
+def test_route_scope_one_instance_per_route():
+    other = Flask("route_scope")
+    before = SharedScopeView.instances
+    RouteScopeView.register(other)
+    eq_(before + 3, SharedScopeView.instances)
+
+    c = other.test_client()
+    ids = set([c.get("/routescope/").data, c.get("/routescope/1").data,
+               c.get("/routescope/custom/").data])
+    eq_(3, len(ids))
@@ -0,0 +1,66 @@
+import inspect
+import threading
+from flask import Flask
+from .view_classes import LazyView
+from nose.tools import *
+
+app = Flask("lazy")
+LazyView.register(app, lazy=True)
+
+client = app.test_client()
+
+
+def test_lazy_registration_does_not_instantiate():
+    other = Flask("lazy_other")
+    before = LazyView.instances
+    LazyView.register(other, lazy=True)
+    eq_(before, LazyView.instances)
+
+
+def test_lazy_view_builds_once():
+    eq_(b"Lazy Get 1", client.get("/lazy/1").data)
+    count = LazyView.instances
+    eq_(b"Lazy Get 2", client.get("/lazy/2").data)
+    eq_(count, LazyView.instances)
+
+
+def test_lazy_views_share_an_instance():
+    other = Flask("lazy_shared")
+    LazyView.register(other, lazy=True)
+    c = other.test_client()
+    before = LazyView.instances
+    c.get("/lazy/")
+    c.get("/lazy/1")
+    c.get("/lazy/later/")
+    eq_(before + 1, LazyView.instances)
+
+
+def test_lazy_view_builds_once_under_concurrency():
+    other = Flask("lazy_concurrent")
+    LazyView.register(other, route_base="/concurrent/", lazy=True)
+    before = LazyView.instances
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        c = other.test_client()
+        barrier.wait()
+        results.append(c.get("/concurrent/").data)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    eq_([b"Lazy Index"] * 8, results)
+    eq_(before + 1, LazyView.instances)
+
+
+def test_lazy_async_view():
+    ok_(inspect.iscoroutinefunction(app.view_functions["LazyView:later"]))
+    eq_(b"Lazy Later", client.get("/lazy/later/").data)
+
+
+def test_lazy_keeps_docstrings():
+    eq_(LazyView.index.__doc__, app.view_functions["LazyView:index"].__doc__)
@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import tempfile
+from flask import Flask
+import flask_classy
+from flask_classy import RouteManifest
+from .view_classes import BasicView, IndexView
+from nose.tools import *
+
+tmp_dir = None
+
+
+def setup_module():
+    global tmp_dir
+    tmp_dir = tempfile.mkdtemp()
+
+
+def teardown_module():
+    shutil.rmtree(tmp_dir)
+
+
+def manifest_path(name):
+    return os.path.join(tmp_dir, name)
+
+
+def test_manifest_written_on_register():
+    path = manifest_path("written.json")
+    BasicView.register(Flask("manifest_written"), manifest=RouteManifest(path))
+
+    with open(path) as f:
+        data = json.load(f)
+    eq_(1, len(data["entries"]))
+    rules = list(data["entries"].values())[0]
+    ok_(["/basic/", "BasicView:index", "index", {"methods": ["GET"], "subdomain": None}] in rules)
+
+
+def test_manifest_replayed_without_introspection():
+    path = manifest_path("replayed.json")
+    BasicView.register(Flask("manifest_first"), manifest=RouteManifest(path))
+
+    original = flask_classy.get_interesting_members
+
+    def fail(*args, **kwargs):
+        raise AssertionError("members should not be inspected")
+
+    flask_classy.get_interesting_members = fail
+    try:
+        app = Flask("manifest_second")
+        BasicView.register(app, manifest=RouteManifest(path))
+    finally:
+        flask_classy.get_interesting_members = original
+
+    client = app.test_client()
+    eq_(b"Index", client.get("/basic/").data)
+    eq_(b"Get 1234", client.get("/basic/1234").data)
+    eq_(b"Multi Routed Method", client.get("/basic/route2/").data)
+
+
+def test_manifest_keyed_on_registration_args():
+    path = manifest_path("args.json")
+    BasicView.register(Flask("manifest_args_one"), manifest=RouteManifest(path))
+
+    app = Flask("manifest_args_two")
+    manifest = RouteManifest(path)
+    BasicView.register(app, route_base="/other/", manifest=manifest)
+    eq_(2, len(manifest.entries))
+    eq_(b"Index", app.test_client().get("/other/").data)
+
+
+def test_manifest_ignores_stale_entries():
+    path = manifest_path("stale.json")
+    manifest = RouteManifest(path)
+    key = manifest.key(BasicView, Flask("manifest_stale"), (None, None, None, None))
+    manifest.file_digests[BasicView.__module__] = "changed"
+    ok_(manifest.key(BasicView, Flask("manifest_stale"), (None, None, None, None)) != key)
+
+
+def test_manifest_with_register_all():
+    path = manifest_path("register_all.json")
+    flask_classy.register_all(Flask("manifest_all"), [BasicView, IndexView],
+                              manifest=RouteManifest(path))
+    eq_(2, len(RouteManifest(path).entries))
+
+
+def test_per_view_manifests_with_register_all():
+    common_path = manifest_path("register_all_common.json")
+    own_path = manifest_path("register_all_own.json")
+    flask_classy.register_all(
+        Flask("manifest_all_per_view"),
+        [BasicView, (IndexView, {"manifest": RouteManifest(own_path)})],
+        manifest=RouteManifest(common_path))
+    eq_(1, len(RouteManifest(common_path).entries))
+    eq_(1, len(RouteManifest(own_path).entries))
+
+
+def test_corrupt_manifest_is_ignored():
+    path = manifest_path("corrupt.json")
+    with open(path, "w") as f:
+        f.write("{not json")
+
+    app = Flask("manifest_corrupt")
+    BasicView.register(app, manifest=RouteManifest(path))
+    eq_(b"Index", app.test_client().get("/basic/").data)
+    eq_(1, len(RouteManifest(path).entries))
@@ -1,5 +1,9 @@
-from flask_classy import get_interesting_members, FlaskView
-from .view_classes import VariedMethodsView, SubVariedMethodsView
+import warnings
+from flask import Flask
+from flask_classy import (get_interesting_members, get_rule_args,
+                          get_true_signature, get_true_argspec, FlaskView)
+from .view_classes import (VariedMethodsView, SubVariedMethodsView,
+                           DecoratedView, SettingNamesView)
 from nose.tools import *
 
 def test_special_method_detected():
@@ -18,3 +22,78 @@ def test_subclass_classmethod_ignored():
     members = [m[1] for m in get_interesting_members(FlaskView, SubVariedMethodsView)]
     assert SubVariedMethodsView.class_method not in members
     assert VariedMethodsView.class_method not in members
+
+
+def test_members_are_cached():
+    first = get_interesting_members(FlaskView, VariedMethodsView)
+    second = get_interesting_members(FlaskView, VariedMethodsView)
+    eq_(first, second)
+    ok_("_classy_members" in VariedMethodsView.__dict__)
+
+def test_member_cache_invalidated_by_new_method():
+    class MutatedView(FlaskView):
+        def index(self):
+            return "Index"
+
+    eq_(["index"], [m[0] for m in get_interesting_members(FlaskView, MutatedView)])
+
+    def extra(self):
+        return "Extra"
+    MutatedView.extra = extra
+    eq_(["extra", "index"], [m[0] for m in get_interesting_members(FlaskView, MutatedView)])
+
+    del MutatedView.extra
+    eq_(["index"], [m[0] for m in get_interesting_members(FlaskView, MutatedView)])
+
+def test_member_cache_invalidated_by_base_change():
+    class BaseView(FlaskView):
+        def index(self):
+            return "Index"
+
+    class ChildView(BaseView):
+        pass
+
+    eq_(["index"], [m[0] for m in get_interesting_members(FlaskView, ChildView)])
+
+    def extra(self):
+        return "Extra"
+    BaseView.extra = extra
+    eq_(["extra", "index"], [m[0] for m in get_interesting_members(FlaskView, ChildView)])
+
+def test_rule_args_through_decorators():
+    eq_(("self", "id"), get_rule_args(DecoratedView.get))
+    eq_(("self", "val"), get_rule_args(DecoratedView.anotherval))
+    eq_(("self", "obj_id"), get_rule_args(DecoratedView.delete))
+
+def test_rule_args_ignore_star_args():
+    def view(self, id, *args, **kwargs):
+        pass
+    eq_(("self", "id"), get_rule_args(view))
+
+def test_signature_is_cached():
+    ok_(get_true_signature(DecoratedView.get) is get_true_signature(DecoratedView.get))
+
+def test_deprecated_argspec():
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        argspec = get_true_argspec(DecoratedView.get)
+    eq_(["self", "id"], argspec.args)
+    eq_(["self", "id"], argspec[0])
+    eq_([DeprecationWarning], [w.category for w in caught])
+
+def test_methods_named_like_settings_are_routed():
+    app = Flask("setting_names")
+    SettingNamesView.register(app)
+    client = app.test_client()
+    eq_(b"Metrics", client.get("/settingnames/metrics/").data)
+    eq_(b"Compress", client.get("/settingnames/compress/").data)
+    eq_(b"Executor", client.get("/settingnames/executor/").data)
+    eq_(b"Coalesce", client.get("/settingnames/coalesce/").data)
+    eq_(b"Rate limit", client.get("/settingnames/rate_limit/").data)
+    eq_(b"Max concurrency", client.get("/settingnames/max_concurrency/").data)
+    eq_(b"Register all", client.get("/settingnames/register_all/").data)
+    eq_(b"Routes", client.get("/settingnames/routes/").data)
+    eq_(b"Representations", client.get("/settingnames/representations/").data)
+    resp = client.get("/settingnames/etag/")
+    eq_(b"Etag", resp.data)
+    ok_("ETag" not in resp.headers)
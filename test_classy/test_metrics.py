@@ -0,0 +1,68 @@
+from flask import Flask
+from flask_classy import ViewMetrics
+from .view_classes import MeasuredView, BasicView
+from nose.tools import *
+
+app = Flask("metrics")
+MeasuredView.register(app)
+BasicView.register(app)
+
+client = app.test_client()
+
+
+def test_phases_recorded():
+    client.get("/measured/")
+    phases = MeasuredView.classy_metrics.summary()["MeasuredView:index"]
+    eq_(set(["before_request", "view", "make_response", "after_view", "total"]),
+        set(phases))
+    ok_(phases["total"]["count"] >= 1)
+    ok_(phases["total"]["sum"] >= phases["view"]["sum"])
+
+
+def test_only_existing_hooks_recorded():
+    client.get("/measured/1")
+    phases = MeasuredView.classy_metrics.summary()["MeasuredView:get"]
+    ok_("after_view" not in phases)
+    ok_("before_request" in phases)
+
+
+def test_async_phases_recorded():
+    eq_(b"Measured Later", client.get("/measured/later/").data)
+    phases = MeasuredView.classy_metrics.summary()["MeasuredView:later"]
+    eq_(1, phases["view"]["count"])
+    eq_(1, phases["total"]["count"])
+
+
+def test_responses_unchanged():
+    eq_(b"Measured 1234", client.get("/measured/1234").data)
+    eq_(MeasuredView.index.__doc__, app.view_functions["MeasuredView:index"].__doc__)
+
+
+def test_disabled_by_default():
+    client.get("/basic/")
+    ok_(BasicView.classy_metrics is None)
+    ok_(not any(e.startswith("BasicView") for e in MeasuredView.classy_metrics.summary()))
+
+
+def test_summary_stats():
+    metrics = ViewMetrics(buckets=(0.1, 1.0))
+    histogram = metrics.histogram("SomeView:index", "view")
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    stats = metrics.summary()["SomeView:index"]["view"]
+    eq_(3, stats["count"])
+    eq_(1.0, stats["p50"])
+    eq_(1.0, stats["p99"])
+    eq_(5.55, round(stats["sum"], 2))
+
+
+def test_prometheus_export():
+    metrics = ViewMetrics(buckets=(0.1, 1.0))
+    metrics.histogram("SomeView:index", "view").observe(0.05)
+    metrics.histogram("SomeView:index", "view").observe(0.5)
+    text = metrics.prometheus()
+    ok_("# TYPE flask_classy_view_duration_seconds histogram" in text)
+    ok_('flask_classy_view_duration_seconds_bucket{endpoint="SomeView:index",phase="view",le="0.1"} 1' in text)
+    ok_('flask_classy_view_duration_seconds_bucket{endpoint="SomeView:index",phase="view",le="+Inf"} 2' in text)
+    ok_('flask_classy_view_duration_seconds_count{endpoint="SomeView:index",phase="view"} 2' in text)
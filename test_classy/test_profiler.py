@@ -0,0 +1,116 @@
+import os
+import pstats
+import shutil
+import signal
+import tempfile
+import threading
+from flask import Flask
+import flask_classy
+from flask_classy import ViewProfiler
+from .view_classes import ProfiledView, StackSampledView
+from nose.tools import *
+
+app = Flask("profiler")
+ProfiledView.register(app)
+StackSampledView.register(app)
+
+client = app.test_client()
+directory = None
+
+
+def setup_module():
+    global directory
+    directory = tempfile.mkdtemp()
+
+
+def teardown_module():
+    shutil.rmtree(directory)
+
+
+def test_samples_one_in_n():
+    ProfiledView.classy_profiler.dump(directory)
+    for _ in range(4):
+        client.get("/profiled/")
+    path, = ProfiledView.classy_profiler.dump(directory)
+    eq_("ProfiledView_index.pstats", os.path.basename(path))
+    stats = pstats.Stats(path)
+    calls = [ncalls for (filename, line, func), (cc, ncalls, tt, ct, callers)
+             in stats.stats.items() if func == "crunch_numbers"]
+    eq_([2], calls)
+
+
+def test_async_view():
+    for _ in range(2):
+        client.get("/profiled/later/")
+    paths = ProfiledView.classy_profiler.dump(directory)
+    eq_(["ProfiledView_later.pstats"], [os.path.basename(p) for p in paths])
+
+
+def test_dump_resets():
+    client.get("/profiled/")
+    client.get("/profiled/")
+    ProfiledView.classy_profiler.dump(directory)
+    eq_([], ProfiledView.classy_profiler.dump(directory))
+
+
+def test_one_cprofile_sample_at_a_time():
+    ProfiledView.classy_profiler.dump(directory)
+    with flask_classy._cprofile_lock:
+        for _ in range(2):
+            eq_(200, client.get("/profiled/").status_code)
+    eq_([], ProfiledView.classy_profiler.dump(directory))
+
+
+def test_other_profiler_active():
+    class BusyProfile(object):
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    ProfiledView.classy_profiler.dump(directory)
+    real_profile = flask_classy.cProfile.Profile
+    flask_classy.cProfile.Profile = BusyProfile
+    try:
+        for _ in range(2):
+            eq_(200, client.get("/profiled/").status_code)
+    finally:
+        flask_classy.cProfile.Profile = real_profile
+    eq_([], ProfiledView.classy_profiler.dump(directory))
+    ok_(not flask_classy._cprofile_lock.locked())
+
+
+def test_collapsed_stacks():
+    client.get("/stacksampled/")
+    path, = StackSampledView.classy_profiler.dump(directory)
+    eq_("StackSampledView_index.collapsed", os.path.basename(path))
+    with open(path) as f:
+        lines = f.read().splitlines()
+    ok_(lines)
+    ok_(any("index (view_classes.py" in line for line in lines))
+    stack, count = lines[0].rsplit(" ", 1)
+    ok_(int(count) >= 1)
+
+
+def test_dump_on_signal():
+    profiler = ViewProfiler(directory=directory)
+    previous = signal.getsignal(signal.SIGUSR2)
+    dumped = threading.Event()
+
+    def dump():
+        # Dumping on the interrupted thread while it holds the lock would
+        # deadlock; time out instead so the test fails rather than hangs.
+        if profiler.lock.acquire(timeout=2):
+            profiler.lock.release()
+            dumped.set()
+
+    profiler.dump = dump
+    try:
+        profiler.dump_on_signal()
+        with profiler.lock:
+            os.kill(os.getpid(), signal.SIGUSR2)
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+    ok_(dumped.wait(5))
+
+
+def test_bad_mode():
+    assert_raises(ValueError, ViewProfiler, mode="magic")
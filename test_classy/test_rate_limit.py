@@ -0,0 +1,91 @@
+from flask import Flask
+from flask_classy import FlaskView, RateLimit, TokenBuckets
+from .view_classes import RateLimitedView
+from nose.tools import *
+
+app = Flask("rate_limit")
+RateLimitedView.register(app)
+
+client = app.test_client()
+
+
+def get_statuses(path, count, client_name="a"):
+    return [client.get(path, headers={"X-Client": client_name}).status_code
+            for _ in range(count)]
+
+
+def test_limits_per_client():
+    eq_([200, 200, 429], get_statuses("/ratelimited/", 3, "one"))
+    eq_([200], get_statuses("/ratelimited/", 1, "two"))
+
+
+def test_retry_after():
+    get_statuses("/ratelimited/", 2, "three")
+    resp = client.get("/ratelimited/", headers={"X-Client": "three"})
+    eq_(429, resp.status_code)
+    eq_("30", resp.headers["Retry-After"])
+
+
+def test_route_burst_on_async_view():
+    eq_([200, 200, 200, 429], get_statuses("/ratelimited/burst/", 4))
+
+
+def test_route_can_lift_limit():
+    eq_([200] * 5, get_statuses("/ratelimited/open/", 5))
+
+
+def test_stats():
+    get_statuses("/ratelimited/", 3, "four")
+    stats = RateLimitedView.classy_rate_limit.stats()["RateLimitedView:index"]
+    ok_(stats["allowed"] >= 2)
+    ok_(stats["limited"] >= 1)
+
+
+def test_buckets_refill():
+    buckets = TokenBuckets()
+    eq_((True, 0), buckets.take("k", 1000.0, 1))
+    allowed, wait = buckets.take("k", 1000.0, 1)
+    ok_(not allowed)
+    ok_(0 < wait <= 0.001)
+
+
+def test_buckets_evict_least_recently_used():
+    buckets = TokenBuckets(maxsize=2)
+    buckets.take("a", 1.0, 5)
+    buckets.take("b", 1.0, 5)
+    buckets.take("a", 1.0, 5)
+    buckets.take("c", 1.0, 5)
+    eq_(["a", "c"], list(buckets.buckets))
+
+
+class SharedBuckets(object):
+    """Stands in for a store shared between processes."""
+
+    def __init__(self):
+        self.taken = {}
+
+    def take(self, key, rate, capacity):
+        self.taken[key] = self.taken.get(key, 0) + 1
+        if self.taken[key] > capacity:
+            return False, 2.5
+        return True, 0
+
+
+def test_shared_backend():
+    backend = SharedBuckets()
+
+    class SharedLimitView(FlaskView):
+        classy_rate_limit = RateLimit(1, backend=backend)
+
+        def index(self):
+            return "Shared"
+
+    apps = [Flask("rate_limit_a"), Flask("rate_limit_b")]
+    for shared_app in apps:
+        SharedLimitView.register(shared_app)
+
+    eq_(200, apps[0].test_client().get("/sharedlimit/").status_code)
+    resp = apps[1].test_client().get("/sharedlimit/")
+    eq_(429, resp.status_code)
+    eq_("3", resp.headers["Retry-After"])
+    eq_({"SharedLimitView:index|127.0.0.1": 2}, backend.taken)
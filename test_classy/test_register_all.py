@@ -0,0 +1,68 @@
+from flask import Flask
+from flask_classy import (FlaskView, EndpointCollisionError, build_url_rules,
+                          register_all, route)
+from .view_classes import BasicView, IndexView, RouteBaseView
+from nose.tools import *
+
+
+def test_register_all():
+    app = Flask("register_all")
+    register_all(app, [BasicView, IndexView])
+    client = app.test_client()
+
+    eq_(b"Index", client.get("/basic/").data)
+    eq_(b"Get 1234", client.get("/basic/1234").data)
+    eq_(b"Index", client.get("/").data)
+
+
+def test_register_all_common_options():
+    app = Flask("register_all_common")
+    register_all(app, [BasicView, RouteBaseView], route_prefix="/api/")
+    client = app.test_client()
+
+    eq_(b"Index", client.get("/api/basic/").data)
+    eq_(b"Index", client.get("/api/base-routed/").data)
+
+
+def test_register_all_per_view_options():
+    app = Flask("register_all_per_view")
+    register_all(app, [(BasicView, {"route_base": "/other/"}), RouteBaseView],
+                           trailing_slash=False)
+    client = app.test_client()
+
+    eq_(b"Index", client.get("/other").data)
+    eq_(b"Get 1234", client.get("/other/1234").data)
+    eq_(b"Index", client.get("/base-routed").data)
+
+
+def test_build_url_rules_does_not_touch_app():
+    app = Flask("build_url_rules")
+    rules = build_url_rules(BasicView, app)
+    eq_([], [r for r in app.url_map.iter_rules() if r.endpoint != "static"])
+    ok_(("/basic/", "BasicView:index") in [(r[0], r[1]) for r in rules])
+
+
+class CollidingView(FlaskView):
+
+    @route("/one/", endpoint="collision")
+    def one(self):
+        return "One"
+
+    @route("/two/", endpoint="collision")
+    def two(self):
+        return "Two"
+
+
+@raises(EndpointCollisionError)
+def test_collision_within_a_view():
+    CollidingView.register(Flask("collision"))
+
+
+def test_collision_rejected_before_adding_rules():
+    app = Flask("collision_up_front")
+    BasicView.register(app)
+    count = len(list(app.url_map.iter_rules()))
+
+    assert_raises(EndpointCollisionError, register_all, app,
+                  [IndexView, (BasicView, {"route_base": "/again/"})])
+    eq_(count, len(list(app.url_map.iter_rules())))
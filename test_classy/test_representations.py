@@ -0,0 +1,97 @@
+import json
+import flask_classy
+from flask import Flask
+from flask_classy import dumps_json, loads_json
+from .view_classes import RepresentationsView, BodyOnlyView, CachedRepresentationsView
+from nose.tools import *
+
+app = Flask("representations")
+RepresentationsView.register(app)
+BodyOnlyView.register(app)
+CachedRepresentationsView.register(app)
+
+client = app.test_client()
+
+
+def test_default_representation():
+    resp = client.get("/representations/")
+    eq_("application/json", resp.mimetype)
+    eq_([[1, 2], [3, 4]], json.loads(resp.data))
+
+
+def test_negotiated_representation():
+    resp = client.get("/representations/", headers={"Accept": "text/csv"})
+    eq_("text/csv", resp.mimetype)
+    eq_(b"1,2\n3,4", resp.data)
+    ok_("Accept" in resp.headers["Vary"])
+
+
+def test_not_acceptable():
+    resp = client.get("/representations/", headers={"Accept": "image/png"})
+    eq_(406, resp.status_code)
+
+
+def test_tuple_return_values():
+    resp = client.get("/representations/7")
+    eq_(201, resp.status_code)
+    eq_("7", resp.headers["X-Id"])
+    eq_({"id": "7"}, json.loads(resp.data))
+
+
+def test_non_collections_untouched():
+    resp = client.get("/representations/text/")
+    eq_(b"just text", resp.data)
+    eq_("text/html", resp.mimetype)
+
+
+def test_body_decoded_into_argument():
+    resp = client.post("/representations/", data='{"a": [1, 2]}',
+                       content_type="application/json")
+    eq_({"received": {"a": [1, 2]}}, json.loads(resp.data))
+
+
+def test_body_argument_is_not_a_url_variable():
+    eq_(b"Body None", client.post("/bodyonly/").data)
+
+
+def test_bad_body():
+    resp = client.post("/bodyonly/", data="{nope", content_type="application/json")
+    eq_(400, resp.status_code)
+
+
+def test_unsupported_body_type():
+    resp = client.post("/bodyonly/", data="a=1",
+                       content_type="application/x-www-form-urlencoded")
+    eq_(415, resp.status_code)
+
+
+def test_stdlib_fallback():
+    orjson, ujson = flask_classy.orjson, flask_classy.ujson
+    flask_classy.orjson = flask_classy.ujson = None
+    try:
+        eq_('{"a":[1,2]}', dumps_json({"a": [1, 2]}))
+        eq_({"a": [1, 2]}, loads_json(b'{"a": [1, 2]}'))
+    finally:
+        flask_classy.orjson, flask_classy.ujson = orjson, ujson
+
+
+def test_encoders_agree():
+    inputs = [{1: "a", "b": [2]}, {"big": 2 ** 70}, [-2 ** 64]]
+    fast = [json.loads(dumps_json(data)) for data in inputs]
+    orjson, ujson = flask_classy.orjson, flask_classy.ujson
+    flask_classy.orjson = flask_classy.ujson = None
+    try:
+        eq_(fast, [json.loads(dumps_json(data)) for data in inputs])
+    finally:
+        flask_classy.orjson, flask_classy.ujson = orjson, ujson
+    eq_([{"1": "a", "b": [2]}, {"big": 2 ** 70}, [-2 ** 64]], fast)
+
+
+def test_cached_once_per_representation():
+    resp = client.get("/cachedrepresentations/", headers={"Accept": "application/json"})
+    eq_("application/json", resp.mimetype)
+    resp = client.get("/cachedrepresentations/", headers={"Accept": "text/csv"})
+    eq_("text/csv", resp.mimetype)
+    eq_(b"1,2\n3,4", resp.data)
+    resp = client.get("/cachedrepresentations/", headers={"Accept": "application/json"})
+    eq_("application/json", resp.mimetype)
@@ -1,4 +1,6 @@
+import threading
 from flask import Flask
+from flask_classy import RoutePrefix, get_routes
 from .view_classes import BasicView, RoutePrefixView, RouteBaseView
 from nose.tools import *
 
@@ -26,3 +28,55 @@ def test_route_prefix_with_route_base():
     resp = client.get('/prefix/base-routed/')
     eq_(b"Index", resp.data)
 
+
+
+def test_registration_leaves_class_alone():
+    other = Flask('route_prefix_untouched')
+    attributes = ("route_base", "route_prefix", "trailing_slash")
+    before = [getattr(RouteBaseView, name) for name in attributes]
+    RouteBaseView.register(other, route_base="/elsewhere/<int:shop>/",
+                           route_prefix="/api/", trailing_slash=False)
+    eq_(before, [getattr(RouteBaseView, name) for name in attributes])
+    ok_(not [name for name in vars(RouteBaseView)
+             if name == "base_args" or name.startswith("orig_")])
+    eq_(["/api/elsewhere/<int:shop>"],
+        [r.rule for r in other.url_map.iter_rules() if r.endpoint != "static"])
+
+
+def test_prefix_variables_are_not_repeated():
+    prefix = RoutePrefix.for_class(BasicView, route_base="/<lang>/things/",
+                                   route_prefix="/<region>/")
+    eq_(("<region>", "<lang>", "things"), prefix.segments)
+    eq_("/<region>/<lang>/things/<obj_id>",
+        prefix.join("/", [("self", None), ("lang", None), ("region", None),
+                          ("obj_id", None)]))
+
+
+def test_join_normalizes_slashes():
+    prefix = RoutePrefix.for_class(RoutePrefixView)
+    eq_("/my_prefix/routeprefix/", prefix.join("/"))
+    eq_("/my_prefix/routeprefix/", prefix.join(""))
+    eq_("/my_prefix/routeprefix/a/b", prefix.join("//a//b"))
+    eq_("/my_prefix/routeprefix/a/<int:id>", prefix.join("/a/", [("id", "int")]))
+    eq_("/", RoutePrefix.for_class(RouteBaseView, route_base="/").join("/"))
+
+
+def test_concurrent_registrations():
+    apps = [Flask('route_prefix_%d' % i) for i in range(8)]
+    barrier = threading.Barrier(len(apps))
+
+    def register(i):
+        barrier.wait()
+        RouteBaseView.register(apps[i], route_base="/base%d/" % i)
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(len(apps))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i, other in enumerate(apps):
+        eq_(["/base%d/" % i],
+            [r.rule for r in other.url_map.iter_rules() if r.endpoint != "static"])
+    recorded = set(record.rule for record in get_routes(RouteBaseView))
+    ok_(set("/base%d/" % i for i in range(len(apps))) <= recorded)
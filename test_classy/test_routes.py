@@ -0,0 +1,63 @@
+from flask import Flask
+from flask_classy import RouteRecord, get_routes, openapi
+from .view_classes import CatalogView
+from nose.tools import *
+
+app = Flask("routes")
+CatalogView.register(app)
+
+
+def test_routes_match_url_map():
+    for record in get_routes(CatalogView):
+        rule = app.url_map._rules_by_endpoint[record.endpoint][0]
+        eq_(rule.rule, record.rule)
+        ok_(set(record.methods) <= rule.methods)
+
+
+def test_route_records():
+    records = dict((record.view_name, record) for record in get_routes(CatalogView))
+    eq_(RouteRecord("/catalog/<int:shop_id>/<int(signed=True):item_id>",
+                    "CatalogView:get", ("GET",), ("shop_id", "item_id"), "get", None),
+        records["get"])
+    eq_(("GET", "PUT"), records["lookup"].methods)
+    eq_("catalog_lookup", records["lookup"].endpoint)
+    eq_(("shop_id", "ref"), records["lookup"].arguments)
+
+
+def test_routes_are_per_class_and_registration():
+    class SubCatalogView(CatalogView):
+        pass
+
+    eq_([], get_routes(SubCatalogView))
+    other = Flask("routes-again")
+    before = len(get_routes(CatalogView))
+    CatalogView.register(other, route_base="/again/<int:shop_id>/")
+    records = get_routes(CatalogView)
+    eq_(2 * before, len(records))
+    ok_(records[-1].rule.startswith("/again/"))
+    CatalogView._classy_routes = CatalogView._classy_routes[:before]
+
+
+def test_openapi():
+    doc = openapi([CatalogView], title="Shops", version="2")
+    eq_({"title": "Shops", "version": "2"}, doc["info"])
+
+    index = doc["paths"]["/catalog/{shop_id}/"]
+    eq_("Lists the items in a shop.", index["get"]["summary"])
+    eq_({"type": "integer"}, index["get"]["parameters"][0]["schema"])
+    eq_({"type": "array", "items": {"type": "integer"}},
+        index["post"]["responses"]["200"]["content"]["application/json"]["schema"])
+    eq_({"type": "object"},
+        index["post"]["requestBody"]["content"]["application/json"]["schema"])
+
+    get = doc["paths"]["/catalog/{shop_id}/{item_id}"]["get"]
+    eq_("CatalogView:get", get["operationId"])
+    eq_({"type": "integer"}, get["parameters"][1]["schema"])
+
+    lookup = doc["paths"]["/catalog/{shop_id}/lookup/{ref}"]
+    eq_(["get", "put"], sorted(lookup))
+    eq_({"type": "string", "format": "uuid"}, lookup["get"]["parameters"][1]["schema"])
+
+
+def test_openapi_is_cached():
+    ok_(openapi([CatalogView]) is openapi([CatalogView]))
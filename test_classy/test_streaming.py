@@ -0,0 +1,55 @@
+from flask import Flask
+from .view_classes import StreamingView, PooledStreamingView
+from nose.tools import *
+
+app = Flask("streaming")
+StreamingView.register(app)
+PooledStreamingView.register(app)
+
+client = app.test_client()
+
+
+def test_generator_method_streamed():
+    with app.test_request_context("/streaming/"):
+        resp = app.view_functions["StreamingView:index"]()
+        ok_(resp.is_streamed)
+
+
+def test_generator_keeps_request_context():
+    resp = client.get("/streaming/?prefix=n")
+    eq_(b"n0,n1,n2,", resp.data)
+
+
+def test_chunk_filter_on_stream():
+    resp = client.get("/streaming/rows/")
+    eq_(b"A,B,", resp.data)
+
+
+def test_stream_route_option():
+    with app.test_request_context("/streaming/helper/"):
+        ok_(app.view_functions["StreamingView:helper"]().is_streamed)
+    eq_(b"xy", client.get("/streaming/helper/").data)
+
+
+def test_plain_method_not_streamed():
+    with app.test_request_context("/streaming/plain/"):
+        ok_(not app.view_functions["StreamingView:plain"]().is_streamed)
+
+
+def test_chunk_filter_on_buffered_response():
+    eq_(b"the ******", client.get("/streaming/filtered/").data)
+
+
+def test_pooled_instance_held_until_stream_closes():
+    with app.test_request_context("/pooledstreaming/"):
+        proxy = app.view_functions["PooledStreamingView:index"]
+        first = proxy()
+        second = proxy()
+        first_id = b"".join(first.iter_encoded())
+        ok_(first_id != b"".join(second.iter_encoded()))
+
+        first.close()
+        third = proxy()
+        eq_(first_id, b"".join(third.iter_encoded()))
+        second.close()
+        third.close()
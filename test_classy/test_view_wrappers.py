@@ -1,6 +1,6 @@
 from flask import Flask
 from .view_classes import (BeforeRequestView, BeforeViewView, AfterRequestView, AfterViewView, DecoratedView,
-                           BeforeRequestReturnsView, BeforeViewReturnsView)
+                           BeforeRequestReturnsView, BeforeViewReturnsView, AllWrappersView)
 from nose.tools import *
 
 app = Flask("wrappers")
@@ -11,6 +11,7 @@ BeforeViewReturnsView.register(app)
 AfterViewView.register(app)
 AfterRequestView.register(app)
 DecoratedView.register(app)
+AllWrappersView.register(app)
 
 client = app.test_client()
 
@@ -45,3 +46,11 @@ def test_before_request_returns():
 def test_before_view_returns():
     resp = client.get("/beforeviewreturns/")
     eq_(b"BEFORE", resp.data)
+
+def test_wrapper_order():
+    resp = client.get("/allwrappers/")
+    eq_(b"index before_index view after_index after_request", resp.data)
+
+def test_wrappers_only_for_their_view():
+    resp = client.get("/allwrappers/1234")
+    eq_(b"get view 1234 after_request", resp.data)
@@ -1,5 +1,15 @@
-from flask_classy import FlaskView, route
+import pickle
+import threading
+import time
+import uuid
+from flask import g, make_response, request
+from flask_classy import (FlaskView, ViewMetrics, ViewExecutor, ViewProfiler,
+                          CachePolicy,
+                          CompressionPolicy, RateLimit, RequestCoalescer, Path, cached,
+                          chunk_filter, dumps_json, route)
+import asyncio
 from functools import wraps
+from typing import List, Optional
 
 VALUE1 = "value1"
 
@@ -149,6 +159,31 @@ class AfterRequestView(FlaskView):
     def index(self):
         return "Index"
 
+class AllWrappersView(FlaskView):
+
+    def before_request(self, name, **kwargs):
+        self.calls = [name]
+
+    def before_index(self):
+        self.calls.append("before_index")
+
+    def after_index(self, response):
+        self.calls.append("after_index")
+        return response
+
+    def after_request(self, name, response):
+        self.calls.append("after_request")
+        response.data = " ".join(self.calls)
+        return response
+
+    def index(self):
+        self.calls.append("view")
+        return "Index"
+
+    def get(self, id):
+        self.calls.append("view " + id)
+        return "Get " + id
+
 class VariedMethodsView(FlaskView):
 
     def index(self):
@@ -331,3 +366,629 @@ class OverrideInheritedTrailingSlashView(TrailingSlashView):
 
 
 
+
+
+class RequestScopeView(FlaskView):
+    classy_instance_scope = "request"
+    instances = 0
+
+    def __init__(self):
+        RequestScopeView.instances += 1
+        self.seen = []
+
+    def before_request(self, name):
+        self.seen.append(name)
+
+    def index(self):
+        self.seen.append("view")
+        return " ".join(self.seen)
+
+
+class PooledView(FlaskView):
+    classy_instance_scope = "pooled"
+    classy_instance_pool_size = 2
+    instances = 0
+
+    def __init__(self):
+        PooledView.instances += 1
+        self.seen = "init"
+
+    def index(self):
+        self.seen += " view"
+        return self.seen
+
+
+class PooledListView(FlaskView):
+    classy_instance_scope = "pooled"
+    classy_instance_pool_size = 1
+
+    def __init__(self):
+        self.items = []
+
+    def index(self):
+        self.items.append(1)
+        return str(len(self.items))
+
+
+class SharedScopeView(FlaskView):
+    instances = 0
+
+    def __init__(self):
+        SharedScopeView.instances += 1
+
+    def index(self):
+        return str(id(self))
+
+    def get(self, obj_id):
+        return str(id(self))
+
+    def custom(self):
+        return str(id(self))
+
+
+class RouteScopeView(SharedScopeView):
+    classy_instance_scope = "route"
+
+
+class InvalidScopeView(FlaskView):
+    classy_instance_scope = "sometimes"
+
+    def index(self):
+        return "Index"
+
+
+class AsyncView(FlaskView):
+
+    async def before_request(self, name, **kwargs):
+        await asyncio.sleep(0)
+        if kwargs.get("id") == "stop":
+            return "Stopped"
+
+    def before_get(self, id):
+        self.sync_before = True
+
+    async def index(self):
+        await asyncio.sleep(0)
+        return "Async Index"
+
+    async def get(self, id):
+        results = await asyncio.gather(asyncio.sleep(0, "a"),
+                                       asyncio.sleep(0, "b"))
+        return "Get %s %s" % (id, "".join(results))
+
+    async def after_get(self, response):
+        response.headers["X-After-Get"] = "yes"
+        return response
+
+    def sync_method(self):
+        return "Sync"
+
+
+class LazyView(FlaskView):
+    instances = 0
+
+    def __init__(self):
+        LazyView.instances += 1
+
+    def index(self):
+        return "Lazy Index"
+
+    def get(self, id):
+        return "Lazy Get " + id
+
+    async def later(self):
+        return "Lazy Later"
+
+
+class MeasuredView(FlaskView):
+    classy_metrics = ViewMetrics()
+
+    def before_request(self, name, **kwargs):
+        pass
+
+    def after_index(self, response):
+        return response
+
+    def index(self):
+        return "Measured"
+
+    def get(self, id):
+        return "Measured " + id
+
+    async def later(self):
+        return "Measured Later"
+
+
+class CachedView(FlaskView):
+    calls = 0
+
+    def before_request(self, name, **kwargs):
+        self.before_request_ran = True
+
+    def before_get(self, id):
+        CachedView.calls += 1
+
+    @cached(ttl=60, vary_on=["page"])
+    def index(self):
+        CachedView.calls += 1
+        return "Cached %d" % CachedView.calls
+
+    @cached(ttl=60)
+    def get(self, id):
+        return "Cached Get %s %d" % (id, CachedView.calls)
+
+    @cached(ttl=0)
+    def expired(self):
+        CachedView.calls += 1
+        return "Expired %d" % CachedView.calls
+
+    @cached(ttl=60)
+    def cookie(self):
+        CachedView.calls += 1
+        resp = make_response("Cookie %d" % CachedView.calls)
+        resp.set_cookie("a", "b")
+        return resp
+
+    @cached(ttl=60)
+    def search(self, *, q: str = ""):
+        CachedView.calls += 1
+        return "Search %s %d" % (q, CachedView.calls)
+
+    def uncached(self):
+        CachedView.calls += 1
+        return "Uncached %d" % CachedView.calls
+
+    def after_request(self, name, response):
+        response.headers["X-After-Request"] = "yes"
+        return response
+
+
+class PicklingBackend(object):
+    """A stand-in for a shared cache like Redis."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        value = self.store.get(key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.store[key] = pickle.dumps(value)
+
+
+class ClassCachedView(FlaskView):
+    classy_cache_policy = CachePolicy(backend=PicklingBackend())
+    calls = 0
+
+    def index(self):
+        ClassCachedView.calls += 1
+        return "Class Cached %d" % ClassCachedView.calls
+
+    def post(self):
+        ClassCachedView.calls += 1
+        return "Posted %d" % ClassCachedView.calls
+
+
+class DeniedCachedView(FlaskView):
+    classy_cache_policy = CachePolicy(ttl=60)
+
+    def before_index(self):
+        return "Denied"
+
+    def index(self):
+        return "Allowed"
+
+    async def before_later(self):
+        return "Denied later"
+
+    async def later(self):
+        return "Allowed later"
+
+
+class ETagView(FlaskView):
+    classy_etag = True
+    calls = 0
+
+    def index(self):
+        ETagView.calls += 1
+        return "ETag Index"
+
+    def etag_get(self, id):
+        if id != "unknown":
+            return "v-" + id
+
+    def get(self, id):
+        ETagView.calls += 1
+        if id == "missing":
+            return "Missing", 404
+        return "ETag Get " + id
+
+    @route("/weak/", etag="weak")
+    def weak(self):
+        return "Weak"
+
+    def post(self):
+        return "Post"
+
+
+class ETagRouteView(FlaskView):
+
+    @route("/", etag=True)
+    def index(self):
+        return "Route ETag"
+
+    def plain(self):
+        return "Plain"
+
+
+class DeniedETagView(FlaskView):
+    classy_etag = True
+
+    def before_index(self):
+        return "Denied"
+
+    def index(self):
+        return "Allowed"
+
+
+class StreamingView(FlaskView):
+
+    def index(self):
+        for i in range(3):
+            yield "%s%d," % (request.args.get("prefix", ""), i)
+
+    @chunk_filter
+    def after_rows(self, chunk):
+        return chunk.upper()
+
+    def rows(self):
+        yield "a,"
+        yield "b,"
+
+    @route("/helper/", stream=True)
+    def helper(self):
+        return iter(["x", "y"])
+
+    def plain(self):
+        return "plain"
+
+    @chunk_filter
+    def after_filtered(self, chunk):
+        return chunk.replace(b"secret", b"******")
+
+    def filtered(self):
+        return "the secret"
+
+
+class PooledStreamingView(FlaskView):
+    classy_instance_scope = "pooled"
+    classy_instance_pool_size = 1
+
+    def index(self):
+        yield str(id(self))
+
+
+def dumps_csv(data):
+    return "\n".join(",".join(str(v) for v in row) for row in data)
+
+
+class RepresentationsView(FlaskView):
+    classy_representations = {"application/json": dumps_json, "text/csv": dumps_csv}
+
+    def index(self):
+        return [[1, 2], [3, 4]]
+
+    def get(self, id):
+        return {"id": id}, 201, {"X-Id": id}
+
+    def text(self):
+        return "just text"
+
+    def post(self, *, body):
+        return {"received": body}
+
+
+class CachedRepresentationsView(FlaskView):
+    classy_representations = {"application/json": dumps_json, "text/csv": dumps_csv}
+    classy_cache_policy = CachePolicy(ttl=60)
+    classy_coalesce = True
+
+    def index(self):
+        return [[1, 2], [3, 4]]
+
+
+class BodyOnlyView(FlaskView):
+
+    def post(self, *, body):
+        return "Body %r" % (body,)
+
+
+class OffloadedView(FlaskView):
+    classy_executor = ViewExecutor(max_workers=2)
+
+    def before_request(self, name, **kwargs):
+        self.request_thread = threading.current_thread().name
+
+    def index(self):
+        return "%s %s" % (threading.current_thread().name != self.request_thread,
+                          request.args.get("q"))
+
+    @route("/slow/", executor=ViewExecutor(max_workers=1, timeout=0.05))
+    def slow(self):
+        time.sleep(0.3)
+        return "Slow"
+
+    async def later(self):
+        return "Later"
+
+    @route("/named/", executor="named-pool")
+    def named(self):
+        return "Named"
+
+
+class SaturatedView(FlaskView):
+    gate = threading.Event()
+    classy_executor = ViewExecutor(max_workers=1, max_queue=1, retry_after=7)
+
+    def index(self):
+        SaturatedView.gate.wait(5)
+        return "Done"
+
+
+class LimitedView(FlaskView):
+    gate = threading.Event()
+    classy_max_concurrency = 1
+    classy_max_queue = 1
+    classy_retry_after = 3
+
+    def index(self):
+        LimitedView.gate.wait(5)
+        return "Done"
+
+    @route("/impatient/", max_queue=0)
+    async def impatient(self):
+        LimitedView.gate.wait(5)
+        return "Impatient"
+
+    @route("/free/", max_concurrency=None)
+    def free(self):
+        return "Free"
+
+
+class ClientView(FlaskView):
+
+    def address(self):
+        return request.remote_addr
+
+    def seen(self):
+        seen = g.get("seen", "nothing")
+        g.seen = request.path
+        return seen
+
+
+class LimitedStreamingView(FlaskView):
+    classy_max_concurrency = 1
+
+    def index(self):
+        yield "a,"
+        yield "b,"
+
+
+class PoliteLimitedView(FlaskView):
+    classy_max_concurrency = 2
+    classy_shed_status = 429
+
+    def index(self):
+        return "Polite"
+
+
+class RateLimitedView(FlaskView):
+    classy_rate_limit = RateLimit(2, per=60, key=lambda: request.headers.get("X-Client"))
+
+    def index(self):
+        return "Limited"
+
+    @route("/burst/", rate_limit=RateLimit(1, per=60, burst=3))
+    async def burst(self):
+        return "Burst"
+
+    @route("/open/", rate_limit=None)
+    def open(self):
+        return "Open"
+
+
+class CatalogView(FlaskView):
+    route_base = "/catalog/<int:shop_id>/"
+
+    def index(self, shop_id):
+        """Lists the items in a shop.
+
+        More words that aren't part of the summary.
+        """
+        return "Index"
+
+    def get(self, shop_id, item_id: int) -> dict:
+        return {"item": item_id}
+
+    def post(self, shop_id, *, body: dict) -> List[int]:
+        return [1]
+
+    @route("/lookup/<uuid:ref>", methods=["GET", "PUT"], endpoint="catalog_lookup")
+    def lookup(self, shop_id, ref):
+        return "Lookup"
+
+
+class Color(str):
+    pass
+
+
+class TypedView(FlaskView):
+
+    def get(self, item_id: int):
+        return "Get %r" % item_id
+
+    def price(self, amount: float):
+        return "Price %r" % amount
+
+    def ref(self, ref: uuid.UUID):
+        return "Ref %s" % type(ref).__name__
+
+    def file(self, name: Path):
+        return "File " + name
+
+    def paint(self, color: Color):
+        return "Paint %s" % color
+
+    def plain(self, name: str):
+        return "Plain " + name
+
+
+class SearchView(FlaskView):
+
+    def index(self, *, q: str, page: int = 1, exact: bool = False,
+              tags: List[str] = ()):
+        return "%s %r %r %r" % (q, page, exact, list(tags))
+
+    def post(self, *, name, count: int):
+        return "%s %r" % (name, count)
+
+    def patch(self, *, name, count: int, body):
+        return "%s %r %r" % (name, count, sorted(body))
+
+    async def ref(self, *, ref: uuid.UUID):
+        return "Ref %s" % ref.hex
+
+    def page(self, *, number: Optional[int] = None):
+        return "Page %r" % number
+
+
+class CompressedView(FlaskView):
+    classy_compress = CompressionPolicy(min_size=100)
+    classy_representations = {"application/json": dumps_json}
+    renders = 0
+
+    def index(self):
+        return [{"id": i, "name": "widget %d" % i} for i in range(100)]
+
+    def after_index(self, response):
+        response.headers["X-Seen-Length"] = str(len(response.get_data()))
+        return response
+
+    def after_request(self, name, response):
+        response.headers["X-Encoding-Before-After-Request"] = \
+            response.headers.get("Content-Encoding", "none")
+        return response
+
+    def small(self):
+        return {"tiny": True}
+
+    def stream(self):
+        for i in range(3):
+            yield "chunk %d " % i * 50
+
+    def picture(self):
+        return make_response(b"\x89PNG" * 100, 200, {"Content-Type": "image/png"})
+
+    @route("/plain/", compress=None)
+    def plain(self):
+        return "x" * 1000
+
+    @cached()
+    def report(self):
+        CompressedView.renders += 1
+        return "report " * 200
+
+    async def later(self):
+        return "later " * 200
+
+
+SLOW_COALESCER = RequestCoalescer(timeout=0.1)
+
+
+class CoalescedView(FlaskView):
+    classy_coalesce = True
+    gate = threading.Event()
+    calls = 0
+
+    def get(self, key):
+        CoalescedView.calls += 1
+        CoalescedView.gate.wait(5)
+        if key == "broken":
+            raise ValueError("backend fell over")
+        return "Value %s %d" % (key, CoalescedView.calls)
+
+    def post(self):
+        CoalescedView.calls += 1
+        return "Posted"
+
+    @route("/slow/", coalesce=SLOW_COALESCER)
+    async def slow(self):
+        CoalescedView.calls += 1
+        CoalescedView.gate.wait(5)
+        return "Slow"
+
+
+class DeniedCoalescedView(FlaskView):
+    classy_coalesce = True
+
+    def before_index(self):
+        return "Denied"
+
+    def index(self):
+        return "Allowed"
+
+
+def crunch_numbers():
+    return sum(i * i for i in range(20000))
+
+
+class ProfiledView(FlaskView):
+    classy_profiler = ViewProfiler(sample_every=2)
+
+    def index(self):
+        return str(crunch_numbers())
+
+    async def later(self):
+        return str(crunch_numbers())
+
+
+class StackSampledView(FlaskView):
+    classy_profiler = ViewProfiler(sample_every=1, mode="stack", interval=0.001)
+
+    def index(self):
+        time.sleep(0.05)
+        return "Sampled"
+
+
+class SettingNamesView(FlaskView):
+
+    def metrics(self):
+        return "Metrics"
+
+    def compress(self):
+        return "Compress"
+
+    def executor(self):
+        return "Executor"
+
+    def coalesce(self):
+        return "Coalesce"
+
+    def rate_limit(self):
+        return "Rate limit"
+
+    def max_concurrency(self):
+        return "Max concurrency"
+
+    def register_all(self):
+        return "Register all"
+
+    def routes(self):
+        return "Routes"
+
+    def etag(self):
+        return "Etag"
+
+    def representations(self):
+        return "Representations"